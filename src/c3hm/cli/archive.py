@@ -0,0 +1,105 @@
+from pathlib import Path
+
+import click
+
+from c3hm.commands.archive import Archiver, read_manifest, restore_folder
+from c3hm.commands.unpack import PATHS_TO_DELETE
+
+
+@click.command(
+    name="archive",
+    help=(
+        "Archive un dossier de correction terminé. Chaque dossier est compressé "
+        "séparément, en parallèle, et les fichiers identiques ne sont conservés "
+        "qu'une fois. Un étudiant peut ensuite être restauré avec 'c3hm restore'."
+    )
+)
+@click.argument(
+    "path",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path),
+    required=True
+)
+@click.option(
+    "--output", "-o",
+    type=click.Path(file_okay=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="Fichier .zip à créer (par défaut, le nom du dossier suivi de .zip)"
+)
+@click.option(
+    "--git", "-g",
+    is_flag=True,
+    default=False,
+    help="Exclure aussi les dossiers .git et .gitignore de l'archive."
+)
+@click.option(
+    "--workers", "-w",
+    type=click.IntRange(1, 64),
+    default=8,
+    help="Nombre de dossiers compressés en parallèle"
+)
+@click.option(
+    "--level", "-l",
+    type=click.IntRange(0, 9),
+    default=6,
+    help="Niveau de compression (0 à 9)"
+)
+@click.option(
+    "--verbose", "-v",
+    is_flag=True,
+    default=False,
+    help="Affiche la progression"
+)
+def archive_command(path: Path, output: Path | None, git: bool, workers: int,
+                    level: int, verbose: bool):
+    """
+    Archive un dossier de correction terminé.
+    """
+    to_delete = list(PATHS_TO_DELETE)
+    if git:
+        to_delete.extend([".git", ".gitignore"])
+    if output is None:
+        output = path.resolve().parent / f"{path.resolve().name}.zip"
+    manifest = Archiver(
+        folder=path,
+        destination=output,
+        paths_to_delete=to_delete,
+        workers=workers,
+        compresslevel=level,
+        verbose=verbose,
+    ).archive()
+    print(f"{len(manifest.folders)} dossiers archivés dans {output}")
+
+
+@click.command(
+    name="restore",
+    help=(
+        "Restaure un seul dossier (ou fichier) d'une archive créée avec 'c3hm archive', "
+        "sans décompresser le reste. STUDENT peut être le nom du dossier ou une partie "
+        "de celui-ci (ex: le matricule). Sans STUDENT, affiche le contenu de l'archive."
+    )
+)
+@click.argument(
+    "archive",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, path_type=Path),
+    required=True
+)
+@click.argument("student", type=str, required=False)
+@click.option(
+    "--dir", "-d",
+    "output_dir",
+    type=click.Path(file_okay=False, dir_okay=True, path_type=Path),
+    default=None,
+    help="Dossier où restaurer (par défaut, le dossier courant)"
+)
+def restore_command(archive: Path, student: str | None, output_dir: Path | None):
+    """
+    Restaure un seul dossier d'une archive créée avec 'c3hm archive'.
+    """
+    if output_dir is None:
+        output_dir = Path.cwd()
+    if student is None:
+        manifest = read_manifest(archive)
+        for name in [*manifest.folders, *manifest.files]:
+            print(name)
+        return
+    print(restore_folder(archive, student, output_dir))
@@ -0,0 +1,91 @@
+from pathlib import Path
+
+import click
+
+from c3hm.commands.autograde import Autograder, print_autograde_report
+from c3hm.commands.unpack import PATHS_TO_DELETE
+
+
+@click.command(
+    name="autograde",
+    help=(
+        "Exécute un script de test sur chaque dossier étudiant, en parallèle, et écrit "
+        "les résultats dans les grilles de correction. Le script reçoit le dossier de "
+        "l'étudiant en argument et doit afficher, sur sa dernière ligne, un objet JSON "
+        "dont les clés sont des plages nommées de la grille (ex: {\"cthm_tests\": 8})."
+    )
+)
+@click.argument(
+    "path",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path),
+    required=True
+)
+@click.argument(
+    "gradebook_dir",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path),
+    required=True
+)
+@click.option(
+    "--script", "-s",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, path_type=Path),
+    required=True,
+    help="Script de test à exécuter pour chaque étudiant"
+)
+@click.option(
+    "--timeout", "-t",
+    type=click.FloatRange(min=1),
+    default=60,
+    help="Temps maximal en secondes pour chaque étudiant"
+)
+@click.option(
+    "--memory", "-m",
+    "memory_mb",
+    type=click.IntRange(min=16),
+    default=None,
+    help="Mémoire maximale en Mo pour chaque étudiant, sans limite par défaut "
+         "(Linux et macOS seulement)"
+)
+@click.option(
+    "--jobs", "-j",
+    type=click.IntRange(1, 64),
+    default=4,
+    help="Nombre d'étudiants testés en même temps"
+)
+@click.option(
+    "--rewrite",
+    is_flag=True,
+    default=False,
+    help="Réécrit les résultats dans les grilles, même ceux déjà écrits lors d'une "
+         "exécution précédente"
+)
+@click.option(
+    "--verbose", "-v",
+    is_flag=True,
+    default=False,
+    help="Affiche la progression"
+)
+def autograde_command(
+    path: Path,
+    gradebook_dir: Path,
+    script: Path,
+    timeout: float,
+    memory_mb: int | None,
+    jobs: int,
+    rewrite: bool,
+    verbose: bool,
+):
+    """
+    Exécute un script de test sur chaque dossier étudiant.
+    """
+    results = Autograder(
+        folder=path,
+        gradebook_dir=gradebook_dir,
+        script=script,
+        paths_to_delete=PATHS_TO_DELETE,
+        timeout=timeout,
+        memory_mb=memory_mb,
+        jobs=jobs,
+        rewrite=rewrite,
+        verbose=verbose
+    ).autograde()
+    print_autograde_report(results)
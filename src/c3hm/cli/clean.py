@@ -35,10 +35,54 @@ from c3hm.commands.unpack import PATHS_TO_DELETE
     help="Affiche la progression"
 )
 
+@click.option(
+    "--fast", "-f",
+    is_flag=True,
+    default=False,
+    help=(
+        "Déplace les dossiers à supprimer dans une corbeille, puis vide la corbeille "
+        "en arrière-plan. Les dossiers étudiants sont propres presque instantanément."
+    )
+)
+
+@click.option(
+    "--workers", "-w",
+    type=click.IntRange(1, 64),
+    default=8,
+    help="Nombre de fils d'exécution pour vider la corbeille (avec --fast)"
+)
+
+@click.option(
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Nettoie tous les dossiers, même ceux qui n'ont pas changé depuis le dernier nettoyage"
+)
+
+@click.option(
+    "--wait",
+    is_flag=True,
+    default=False,
+    help="Avec --fast, attend que la corbeille soit vidée au lieu de la vider en arrière-plan"
+)
+
+@click.option(
+    "--purge-only",
+    is_flag=True,
+    default=False,
+    hidden=True,
+    help="Vide seulement la corbeille (utilisé par le vidage en arrière-plan)"
+)
+
 def clean_command(
     path: Path,
     git: bool,
     verbose: bool,
+    fast: bool,
+    workers: int,
+    force: bool,
+    wait: bool,
+    purge_only: bool,
 ):
     """
     Supprime les fichiers et dossiers indésirables et renomme les dossiers étudiants
@@ -49,5 +93,10 @@ def clean_command(
     Cleaner(
         folder=path,
         paths_to_delete=to_delete,
-        verbose=verbose
+        verbose=verbose,
+        fast=fast,
+        workers=workers,
+        force=force,
+        wait=wait,
+        purge_only=purge_only,
     ).clean_folders()
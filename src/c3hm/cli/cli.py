@@ -1,8 +1,16 @@
 import click
 
+from c3hm.cli.archive import archive_command, restore_command
+from c3hm.cli.autograde import autograde_command
 from c3hm.cli.clean import clean_command
+from c3hm.cli.du import du_command
 from c3hm.cli.feedback import feedback_command
 from c3hm.cli.gradebook import gradebook_command
+from c3hm.cli.migrate import migrate_command
+from c3hm.cli.open import open_command
+from c3hm.cli.serve import serve_command
+from c3hm.cli.similarity import similarity_command
+from c3hm.cli.status import status_command
 from c3hm.cli.template import template_command
 from c3hm.cli.unpack import unpack_command
 
@@ -20,6 +28,15 @@ cli.add_command(unpack_command)
 cli.add_command(gradebook_command)
 cli.add_command(feedback_command)
 cli.add_command(clean_command)
+cli.add_command(du_command)
+cli.add_command(similarity_command)
+cli.add_command(autograde_command)
+cli.add_command(open_command)
+cli.add_command(migrate_command)
+cli.add_command(archive_command)
+cli.add_command(restore_command)
+cli.add_command(serve_command)
+cli.add_command(status_command)
 
 def main():
     """
@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import click
+
+from c3hm.commands.du import disk_usage, print_disk_usage
+from c3hm.commands.unpack import PATHS_TO_DELETE
+
+
+@click.command(
+    name="du",
+    help=(
+        "Affiche l'espace disque utilisé par chaque dossier étudiant, l'espace occupé "
+        "par les fichiers inutiles et les dossiers modifiés depuis le dernier nettoyage."
+    )
+)
+@click.argument(
+    "path",
+    type=click.Path(
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        path_type=Path
+    ),
+    required=True
+)
+@click.option(
+    "--git", "-g",
+    is_flag=True,
+    default=False,
+    help="Compter les dossiers .git et .gitignore parmi les fichiers indésirables."
+)
+@click.option(
+    "--refresh", "-r",
+    is_flag=True,
+    default=False,
+    help="Parcourt de nouveau tous les dossiers au lieu d'utiliser l'index"
+)
+def du_command(path: Path, git: bool, refresh: bool):
+    """
+    Affiche l'espace disque utilisé par chaque dossier étudiant.
+    """
+    to_delete = list(PATHS_TO_DELETE)
+    if git:
+        to_delete.extend([".git", ".gitignore"])
+    print_disk_usage(disk_usage(path, to_delete, refresh=refresh))
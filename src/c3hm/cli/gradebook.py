@@ -2,7 +2,7 @@ from pathlib import Path
 
 import click
 
-from c3hm.commands.gradebook import generate_gradebook
+from c3hm.commands.gradebook import generate_gradebook, sync_gradebook
 
 
 @click.command(
@@ -28,10 +28,34 @@ from c3hm.commands.gradebook import generate_gradebook
     help="Répertoire de sortie pour les fichiers générés",
     default=None
 )
-def gradebook_command(rubric_path: Path, students_file: Path, output_dir: Path | None):
+@click.option(
+    "--single", "-s",
+    "single_workbook",
+    is_flag=True,
+    default=False,
+    help="Génère un seul classeur avec une feuille par étudiant au lieu d'un fichier par étudiant"
+)
+@click.option(
+    "--sync",
+    is_flag=True,
+    default=False,
+    help=(
+        "Met à jour un dossier de grilles existant: crée seulement les grilles des nouveaux "
+        "étudiants et déplace celles des étudiants retirés dans le dossier 'archives'. "
+        "Les grilles existantes ne sont pas modifiées."
+    )
+)
+def gradebook_command(rubric_path: Path, students_file: Path, output_dir: Path | None,
+                      single_workbook: bool, sync: bool):
     """
     Génère les grilles de correction à partir d'un modèle et d'une liste d'étudiants.
     """
     if not output_dir:
         output_dir = Path.cwd() / Path("grilles de correction")
-    generate_gradebook(rubric_path, students_file, output_dir)
+    if sync:
+        if single_workbook:
+            raise click.UsageError("Les options --sync et --single ne peuvent pas être combinées.")
+        sync_gradebook(rubric_path, students_file, output_dir)
+    else:
+        generate_gradebook(rubric_path, students_file, output_dir,
+                           single_workbook=single_workbook)
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import click
+
+from c3hm.commands.migrate import migrate_gradebooks, print_migration_report
+
+
+@click.command(
+    name="migrate",
+    help=(
+        "Transpose les grilles de correction déjà remplies vers une nouvelle version du "
+        "modèle (coquille corrigée, indicateur ajouté, pondération modifiée, etc.), en "
+        "conservant les niveaux choisis et les commentaires."
+    )
+)
+@click.argument(
+    "old_rubric",
+    type=click.Path(file_okay=True, dir_okay=False, exists=True, path_type=Path),
+    required=True
+)
+@click.argument(
+    "new_rubric",
+    type=click.Path(file_okay=True, dir_okay=False, exists=True, path_type=Path),
+    required=True
+)
+@click.argument(
+    "gradebook_dir",
+    type=click.Path(file_okay=False, dir_okay=True, exists=True, path_type=Path),
+    required=True
+)
+@click.option(
+    "--dry-run", "-n",
+    is_flag=True,
+    default=False,
+    help="Affiche les conflits sans modifier les grilles"
+)
+@click.option(
+    "--workers", "-w",
+    type=click.IntRange(1, 64),
+    default=None,
+    help="Nombre de processus (par défaut, le nombre de cœurs)"
+)
+def migrate_command(old_rubric: Path, new_rubric: Path, gradebook_dir: Path,
+                    dry_run: bool, workers: int | None):
+    """
+    Transpose les grilles de correction déjà remplies vers une nouvelle version du modèle.
+    """
+    mapping, results = migrate_gradebooks(old_rubric, new_rubric, gradebook_dir,
+                                          dry_run=dry_run, workers=workers)
+    print_migration_report(mapping, results)
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import click
+
+from c3hm.commands.lazy import LAZY_INDEX_FILE_NAME, LazyIndex
+
+
+@click.command(
+    name="open",
+    help=(
+        "Extrait à la demande un fichier ou un dossier de la remise d'un étudiant "
+        "préparée avec 'c3hm unpack --lazy' et affiche son chemin. STUDENT peut être "
+        "le nom du dossier de l'étudiant ou une partie de celui-ci (ex: son matricule)."
+    )
+)
+@click.argument("student", type=str, required=True)
+@click.argument("path", type=str, default="", required=False)
+@click.option(
+    "--dir", "-d",
+    "folder",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path),
+    default=None,
+    help="Dossier préparé avec 'c3hm unpack --lazy' (par défaut, le dossier courant)"
+)
+@click.option(
+    "--max-size", "-m",
+    "max_size_mb",
+    type=click.IntRange(min=1),
+    default=2048,
+    help="Taille maximale du cache en Mo"
+)
+@click.option(
+    "--launch",
+    is_flag=True,
+    default=False,
+    help="Ouvre le fichier ou le dossier extrait avec l'application par défaut"
+)
+def open_command(student: str, path: str, folder: Path | None, max_size_mb: int, launch: bool):
+    """
+    Extrait à la demande un fichier ou un dossier de la remise d'un étudiant.
+    """
+    if folder is None:
+        folder = Path.cwd()
+    if not (folder / LAZY_INDEX_FILE_NAME).exists():
+        raise FileNotFoundError(
+            f"Le dossier {folder} n'a pas été préparé avec 'c3hm unpack --lazy'."
+        )
+    with LazyIndex(folder) as index:
+        name = index.find_student(student)
+        extracted = index.open(name, path, max_cache_size=max_size_mb * 1024 * 1024)
+    print(extracted)
+    if launch:
+        click.launch(str(extracted))
@@ -0,0 +1,57 @@
+from pathlib import Path
+
+import click
+
+from c3hm.commands.serve import DEFAULT_PORT, serve
+
+
+@click.command(
+    name="serve",
+    help=(
+        "Démarre un serveur local qui garde les grilles en mémoire et les relit dès "
+        "qu'elles sont modifiées. Routes: /totals (notes), /progress (avancement de la "
+        "correction), /omnivox.json et /omnivox.xlsx (export pour Omnivox)."
+    )
+)
+@click.argument(
+    "gradebook_dir",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path),
+    required=True
+)
+@click.option(
+    "--rubric", "-r",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, path_type=Path),
+    default=None,
+    help="Modèle de la grille (par défaut, la disposition de la première grille du dossier)"
+)
+@click.option(
+    "--host",
+    type=str,
+    default="127.0.0.1",
+    help="Adresse d'écoute du serveur"
+)
+@click.option(
+    "--port", "-p",
+    type=click.IntRange(0, 65535),
+    default=DEFAULT_PORT,
+    help="Port du serveur"
+)
+@click.option(
+    "--interval", "-i",
+    type=click.FloatRange(min=0.1),
+    default=1.0,
+    help="Délai en secondes entre deux vérifications des fichiers modifiés"
+)
+@click.option(
+    "--verbose", "-v",
+    is_flag=True,
+    default=False,
+    help="Affiche les requêtes et les grilles relues"
+)
+def serve_command(gradebook_dir: Path, rubric: Path | None, host: str, port: int,
+                  interval: float, verbose: bool):
+    """
+    Démarre un serveur local qui garde les grilles en mémoire.
+    """
+    serve(gradebook_dir, rubric=rubric, host=host, port=port, interval=interval,
+          verbose=verbose)
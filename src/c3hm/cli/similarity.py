@@ -0,0 +1,70 @@
+from pathlib import Path
+
+import click
+
+from c3hm.commands.similarity import SimilarityChecker, print_similarity_report
+from c3hm.commands.unpack import PATHS_TO_DELETE
+
+
+@click.command(
+    name="similarity",
+    help=(
+        "Détecte les remises dont le code est suspicieusement similaire. "
+        "Plusieurs dossiers (groupes) peuvent être comparés ensemble."
+    )
+)
+@click.argument(
+    "paths",
+    type=click.Path(
+        exists=True,
+        file_okay=False,
+        dir_okay=True,
+        path_type=Path
+    ),
+    nargs=-1,
+    required=True
+)
+@click.option(
+    "--base", "-b",
+    "base_folder",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path),
+    default=None,
+    help="Dossier contenant le code de départ fourni aux étudiants, à ignorer"
+)
+@click.option(
+    "--threshold", "-t",
+    type=click.FloatRange(0.0, 1.0),
+    default=0.5,
+    help="Similarité minimale (entre 0 et 1) pour qu'une paire soit signalée"
+)
+@click.option(
+    "--workers", "-w",
+    type=click.IntRange(1, 64),
+    default=None,
+    help="Nombre de processus (par défaut, le nombre de cœurs)"
+)
+@click.option(
+    "--verbose", "-v",
+    is_flag=True,
+    default=False,
+    help="Affiche la progression"
+)
+def similarity_command(
+    paths: tuple[Path, ...],
+    base_folder: Path | None,
+    threshold: float,
+    workers: int | None,
+    verbose: bool,
+):
+    """
+    Détecte les remises dont le code est suspicieusement similaire.
+    """
+    pairs = SimilarityChecker(
+        folders=list(paths),
+        paths_to_delete=PATHS_TO_DELETE,
+        base_folder=base_folder,
+        threshold=threshold,
+        workers=workers,
+        verbose=verbose
+    ).find_similar()
+    print_similarity_report(pairs)
@@ -0,0 +1,53 @@
+from pathlib import Path
+
+import click
+
+from c3hm.commands.status import gradebook_status, print_status
+
+
+@click.command(
+    name="status",
+    help=(
+        "Affiche l'avancement de la correction: pour chaque étudiant, les indicateurs "
+        "sans niveau, ceux avec plusieurs niveaux (#N/A) et l'absence de commentaire."
+    )
+)
+@click.argument(
+    "gradebook_dir",
+    type=click.Path(exists=True, file_okay=False, dir_okay=True, path_type=Path),
+    required=True
+)
+@click.option(
+    "--rubric", "-r",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, path_type=Path),
+    default=None,
+    help=(
+        "Modèle de la grille (par défaut, la disposition de la première grille du dossier). "
+        "Accélère la lecture d'un classeur unique."
+    )
+)
+@click.option(
+    "--incomplete", "-i",
+    is_flag=True,
+    default=False,
+    help="N'affiche que les grilles à compléter"
+)
+@click.option(
+    "--workers", "-w",
+    type=click.IntRange(1, 64),
+    default=None,
+    help="Nombre de processus (par défaut, selon le nombre de grilles et de cœurs)"
+)
+@click.option(
+    "--verbose", "-v",
+    is_flag=True,
+    default=False,
+    help="Affiche les indicateurs à compléter de chaque grille"
+)
+def status_command(gradebook_dir: Path, rubric: Path | None, incomplete: bool,
+                   workers: int | None, verbose: bool):
+    """
+    Affiche l'avancement de la correction.
+    """
+    report = gradebook_status(gradebook_dir, rubric=rubric, workers=workers)
+    print_status(report, incomplete_only=incomplete, verbose=verbose)
@@ -41,10 +41,33 @@ from c3hm.commands.unpack import PATHS_TO_DELETE, UnpackOmnivox
     help="Affiche la progression"
 )
 
+@click.option(
+    "--stream", "-s",
+    "streaming",
+    is_flag=True,
+    default=False,
+    help=(
+        "Lit les archives des étudiants directement dans l'archive Omnivox, sans écrire "
+        "les archives intermédiaires sur disque ni extraire les fichiers indésirables."
+    )
+)
+
+@click.option(
+    "--lazy", "-l",
+    is_flag=True,
+    default=False,
+    help=(
+        "N'extrait pas les archives .zip des étudiants: elles sont seulement indexées. "
+        "Utilisez ensuite 'c3hm open' pour extraire les fichiers à consulter."
+    )
+)
+
 def unpack_command(
     path: Path,
     git: bool,
     verbose: bool,
+    streaming: bool,
+    lazy: bool,
 ):
     """
     Supprime les fichiers et dossiers indésirables et renomme les dossiers étudiants
@@ -55,5 +78,7 @@ def unpack_command(
     UnpackOmnivox(
         folder=path,
         paths_to_delete=to_delete,
-        verbose=verbose
+        verbose=verbose,
+        streaming=streaming,
+        lazy=lazy
     ).unpack()
@@ -0,0 +1,271 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import zipfile
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+
+from pydantic import BaseModel
+
+from c3hm.data.submission_index import C3HM_PREFIX, is_pruned
+
+MANIFEST_NAME = "manifest.json"
+FOLDERS_PREFIX = "dossiers/"
+FILES_PREFIX = "fichiers/"
+
+# Fichiers déjà compressés: les recompresser coûte du temps pour rien
+STORED_EXTENSIONS = {
+    ".zip", ".7z", ".rar", ".gz", ".bz2", ".xz", ".jar",
+    ".docx", ".xlsx", ".pptx", ".odt", ".ods",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".mp3", ".mp4", ".mov", ".avi", ".mkv",
+}
+
+_CHUNK_SIZE = 1024 * 1024
+
+
+class ArchivedFile(BaseModel):
+    path: str
+    size: int
+    # (dossier, chemin) du fichier identique réellement conservé dans l'archive
+    same_as: tuple[str, str] | None = None
+
+
+class ArchivedFolder(BaseModel):
+    member: str
+    files: list[ArchivedFile] = []
+
+
+class ArchiveManifest(BaseModel):
+    """
+    Table des matières de l'archive, enregistrée dans `manifest.json`.
+    """
+    source: str
+    created: str
+    folders: dict[str, ArchivedFolder] = {}
+    files: list[str] = []
+
+
+class Archiver(BaseModel):
+    verbose: bool = False
+    folder: Path
+    destination: Path
+    paths_to_delete: list[str]
+    workers: int = 8
+    compresslevel: int = 6
+
+    def archive(self) -> ArchiveManifest:
+        """
+        Archive un dossier de correction terminé.
+
+        Chaque dossier de premier niveau (un par étudiant, grilles, etc.) est
+        compressé dans sa propre archive .zip, en parallèle. Ces archives sont
+        ensuite placées sans recompression dans l'archive finale, avec un
+        manifeste qui permet de restaurer un seul étudiant sans tout décompresser.
+        Les fichiers identiques ne sont conservés qu'une fois.
+        """
+        if not self.folder.exists():
+            raise FileNotFoundError(f"Le dossier {self.folder} n'existe pas.")
+        if self.destination.exists():
+            raise FileExistsError(f"L'archive {self.destination} existe déjà.")
+
+        self._vprint(f"Début de l'archivage de {self.folder}")
+
+        folders = []
+        loose_files = []
+        for entry in sorted(self.folder.iterdir()):
+            if entry.name.startswith(C3HM_PREFIX) or is_pruned(entry.name, self.paths_to_delete):
+                continue
+            if entry.resolve() == self.destination.resolve():
+                continue
+            if entry.is_dir():
+                folders.append(entry)
+            elif entry.is_file():
+                loose_files.append(entry)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            listings = list(pool.map(self._list_files, folders))
+        manifest = ArchiveManifest(
+            source=self.folder.name,
+            created=datetime.now().isoformat(timespec="seconds"),
+            files=[f.name for f in loose_files],
+        )
+        for folder, listing in zip(folders, listings, strict=True):
+            manifest.folders[folder.name] = ArchivedFolder(
+                member=f"{FOLDERS_PREFIX}{folder.name}.zip",
+                files=[ArchivedFile(path=path, size=size) for path, size in listing],
+            )
+        self._deduplicate(manifest)
+
+        self.destination.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.destination.parent,
+                                         prefix=f"{C3HM_PREFIX}_archive_") as tmp:
+            tmp_folder = Path(tmp)
+            # L'archive est construite à côté de la destination, puis renommée une fois
+            # terminée: une erreur ne laisse pas d'archive incomplète derrière elle
+            tmp_archive = tmp_folder / "archive.zip"
+            with (ThreadPoolExecutor(max_workers=self.workers) as pool,
+                  zipfile.ZipFile(tmp_archive, "w") as outer):
+                jobs = [
+                    pool.submit(self._compress_folder, name, archived,
+                                tmp_folder / f"{i}.zip")
+                    for i, (name, archived) in enumerate(manifest.folders.items())
+                ]
+                # Les archives internes sont ajoutées dans l'ordre, dès qu'elles sont prêtes
+                for job, archived in zip(jobs, manifest.folders.values(), strict=True):
+                    inner = job.result()
+                    outer.write(inner, archived.member, compress_type=zipfile.ZIP_STORED)
+                    inner.unlink()
+                for f in loose_files:
+                    outer.write(f, FILES_PREFIX + f.name, compress_type=self._compression(f.name),
+                                compresslevel=self.compresslevel)
+                outer.writestr(MANIFEST_NAME, manifest.model_dump_json(indent=2),
+                               compress_type=zipfile.ZIP_DEFLATED)
+            os.replace(tmp_archive, self.destination)
+
+        self._vprint(f"Archive créée : {self.destination}")
+        return manifest
+
+    def _list_files(self, folder: Path) -> list[tuple[str, int]]:
+        """
+        Liste les fichiers à archiver d'un dossier, sans les fichiers indésirables.
+        """
+        files = []
+        for root, dirs, names in os.walk(folder):
+            dirs[:] = sorted(d for d in dirs if not is_pruned(d, self.paths_to_delete))
+            for name in sorted(names):
+                if is_pruned(name, self.paths_to_delete):
+                    continue
+                path = Path(root) / name
+                try:
+                    size = path.stat().st_size
+                except OSError:
+                    continue
+                files.append((path.relative_to(folder).as_posix(), size))
+        return files
+
+    def _deduplicate(self, manifest: ArchiveManifest):
+        """
+        Repère les fichiers identiques. Seuls les fichiers dont la taille est partagée
+        par un autre fichier sont lus et hachés. Le premier fichier rencontré (par ordre
+        alphabétique des dossiers) est conservé et les autres y font référence.
+        """
+        by_size: dict[int, list[tuple[str, ArchivedFile]]] = defaultdict(list)
+        for name, archived in manifest.folders.items():
+            for f in archived.files:
+                if f.size > 0:
+                    by_size[f.size].append((name, f))
+        candidates = [c for group in by_size.values() if len(group) > 1 for c in group]
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            digests = list(pool.map(
+                lambda c: _sha256(self.folder / c[0] / c[1].path), candidates
+            ))
+
+        owners: dict[str, tuple[str, str]] = {}
+        saved = 0
+        for (name, f), digest in zip(candidates, digests, strict=True):
+            if digest is None:
+                continue
+            if digest in owners:
+                f.same_as = owners[digest]
+                saved += f.size
+            else:
+                owners[digest] = (name, f.path)
+        self._vprint(f"Fichiers en double : {saved / (1024 * 1024):.1f} Mo économisés")
+
+    def _compress_folder(self, name: str, archived: ArchivedFolder, output: Path) -> Path:
+        self._vprint(f"Compresser : {name}")
+        with zipfile.ZipFile(output, "w") as z:
+            for f in archived.files:
+                if f.same_as is None:
+                    z.write(self.folder / name / f.path, f.path,
+                            compress_type=self._compression(f.path),
+                            compresslevel=self.compresslevel)
+        return output
+
+    def _compression(self, name: str) -> int:
+        if os.path.splitext(name)[1].lower() in STORED_EXTENSIONS:
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
+
+    def _vprint(self, *args):
+        if self.verbose:
+            print(*args)
+
+
+def read_manifest(archive: Path) -> ArchiveManifest:
+    with zipfile.ZipFile(archive) as z:
+        return ArchiveManifest.model_validate_json(z.read(MANIFEST_NAME))
+
+
+def find_archived_folder(manifest: ArchiveManifest, query: str) -> str:
+    """
+    Trouve un dossier ou un fichier de premier niveau de l'archive (une remise
+    d'un seul fichier, par exemple) à partir de son nom complet ou d'une partie
+    de son nom (par exemple le matricule de l'étudiant).
+    """
+    names = [*manifest.folders, *manifest.files]
+    if query in names:
+        return query
+    matches = [name for name in names if query.lower() in name.lower()]
+    if not matches:
+        raise ValueError(f"Aucun dossier de l'archive ne correspond à '{query}'.")
+    if len(matches) > 1:
+        raise ValueError(f"Plusieurs dossiers correspondent à '{query}' : " + ", ".join(matches))
+    return matches[0]
+
+
+def restore_folder(archive: Path, query: str, output_dir: Path) -> Path:
+    """
+    Restaure un seul dossier de l'archive dans `output_dir`. Seule l'archive interne
+    de ce dossier est lue, ainsi que celles qui contiennent ses fichiers en double.
+    Un fichier de premier niveau est restauré tel quel.
+    """
+    manifest = read_manifest(archive)
+    name = find_archived_folder(manifest, query)
+    destination = output_dir / name
+    if destination.exists():
+        raise FileExistsError(f"{destination} existe déjà.")
+
+    if name not in manifest.folders:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with (zipfile.ZipFile(archive) as outer,
+              outer.open(FILES_PREFIX + name) as src, open(destination, "wb") as dst):
+            shutil.copyfileobj(src, dst, _CHUNK_SIZE)
+        return destination
+
+    with zipfile.ZipFile(archive) as outer:
+        inner_zips: dict[str, zipfile.ZipFile] = {}
+
+        def inner(folder_name: str) -> zipfile.ZipFile:
+            # Les archives internes ne sont pas compressées: on y accède directement
+            if folder_name not in inner_zips:
+                member = manifest.folders[folder_name].member
+                inner_zips[folder_name] = zipfile.ZipFile(outer.open(member))
+            return inner_zips[folder_name]
+
+        try:
+            for f in manifest.folders[name].files:
+                owner, path = f.same_as or (name, f.path)
+                target = destination / PurePosixPath(f.path)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                with inner(owner).open(path) as src, open(target, "wb") as dst:
+                    shutil.copyfileobj(src, dst, _CHUNK_SIZE)
+        finally:
+            for z in inner_zips.values():
+                z.close()
+    return destination
+
+
+def _sha256(path: Path) -> str | None:
+    h = hashlib.sha256()
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(_CHUNK_SIZE):
+                h.update(chunk)
+    except OSError:
+        return None
+    return h.hexdigest()
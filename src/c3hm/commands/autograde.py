@@ -0,0 +1,323 @@
+import contextlib
+import hashlib
+import json
+import os
+import re
+import signal
+import sqlite3
+import subprocess
+import sys
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import openpyxl
+from pydantic import BaseModel
+
+from c3hm.commands.gradebook import (
+    SINGLE_WORKBOOK_NAME,
+    gradebook_student_id,
+    write_named_values,
+)
+from c3hm.commands.grading import single_workbook_sheets
+from c3hm.data.submission_index import is_pruned, is_student_folder
+from c3hm.data.xlsx import XlsxReader
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+CACHE_FILE_NAME = ".c3hm_autograde.sqlite"
+
+# Applique la limite de mémoire puis remplace le processus par le script de test.
+# Évite preexec_fn, qui n'est pas sûr lorsque Popen est appelé depuis plusieurs fils.
+# RLIMIT_DATA limite la mémoire réellement allouée; RLIMIT_AS limiterait aussi les
+# réservations d'adresses virtuelles et ferait échouer .NET ou la JVM au démarrage.
+_MEMORY_LIMIT_WRAPPER = (
+    "import os, resource, sys\n"
+    "limit = int(sys.argv[1])\n"
+    "resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))\n"
+    "os.execvp(sys.argv[2], sys.argv[2:])\n"
+)
+
+# Délai accordé pour récupérer la sortie d'un processus tué
+_KILL_GRACE = 5
+
+
+class AutogradeResult(BaseModel):
+    student: str
+    values: dict[str, Any] = {}
+    error: str | None = None
+    cached: bool = False
+
+
+class Autograder(BaseModel):
+    """
+    Exécute un script de test sur chaque dossier étudiant et écrit les résultats
+    dans les grilles de correction.
+
+    Le script reçoit le chemin du dossier étudiant en argument et est exécuté dans
+    ce dossier. La dernière ligne de sa sortie standard doit être un objet JSON dont
+    les clés sont des plages nommées de la grille, par exemple
+    `{"cthm_tests": 8, "cthm_tests_commentaire": "2 tests échouent"}`.
+    Si le dossier des grilles contient un classeur unique (`grilles.xlsx`), les
+    valeurs sont écrites dans la feuille de l'étudiant.
+
+    Ce n'est pas un vrai bac à sable: le script s'exécute avec les droits de
+    l'utilisateur. Seuls le temps, la mémoire (si `memory_mb` est donné, sous
+    Linux et macOS) et le nombre d'exécutions simultanées sont limités.
+    """
+    verbose: bool = False
+    folder: Path
+    gradebook_dir: Path
+    script: Path
+    paths_to_delete: list[str]
+    timeout: float = 60
+    memory_mb: int | None = None
+    jobs: int = 4
+    rewrite: bool = False
+
+    def autograde(self) -> list[AutogradeResult]:
+        if not self.folder.exists():
+            raise FileNotFoundError(f"Le dossier {self.folder} n'existe pas.")
+        if not self.gradebook_dir.exists():
+            raise FileNotFoundError(f"Le dossier {self.gradebook_dir} n'existe pas.")
+        if self.memory_mb is not None and resource is None:
+            print("Avertissement: la limite de mémoire n'est pas supportée sur cette plateforme.")
+
+        gradebooks = self._gradebooks()
+        students: list[tuple[Path, tuple[Path, str | None]]] = []
+        for student_dir in sorted(self.folder.iterdir()):
+            if not is_student_folder(student_dir):
+                continue
+            gradebook = _find_gradebook(student_dir.name, gradebooks)
+            if gradebook is None:
+                print(f"Avertissement: aucune grille trouvée pour {student_dir.name}. "
+                      "Il sera ignoré.")
+                continue
+            students.append((student_dir, gradebook))
+
+        script_hash = hashlib.sha256(self.script.read_bytes()).hexdigest()
+        conn = sqlite3.connect(self.folder / CACHE_FILE_NAME, check_same_thread=False)
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results (student TEXT PRIMARY KEY, "
+                "content_hash TEXT, script_hash TEXT, result TEXT, written INTEGER)"
+            )
+            cache = {
+                row[0]: row[1:] for row in conn.execute(
+                    "SELECT student, content_hash, script_hash, result, written FROM results"
+                )
+            }
+
+            def grade(student_dir: Path) -> tuple[AutogradeResult, str]:
+                content_hash = submission_hash(student_dir, self.paths_to_delete)
+                entry = cache.get(student_dir.name)
+                if entry and entry[0] == content_hash and entry[1] == script_hash:
+                    result = AutogradeResult.model_validate_json(entry[2])
+                    result.cached = True
+                    return result, content_hash
+                self._vprint(f"Exécution des tests : {student_dir.name}")
+                return self._run(student_dir), content_hash
+
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                outcomes = list(pool.map(grade, [s for s, _ in students]))
+
+            # openpyxl n'est pas thread-safe: les grilles sont écrites une à la fois,
+            # et un classeur unique n'est ouvert et enregistré qu'une fois.
+            # Un résultat déjà écrit n'est pas réécrit, pour ne pas écraser une
+            # correction manuelle faite depuis, sauf si ses cellules sont vides.
+            results = []
+            rows = []
+            to_write: dict[Path, list[tuple[str | None, AutogradeResult]]] = defaultdict(list)
+            written: dict[Path, list[tuple[str | None, AutogradeResult]]] = defaultdict(list)
+            for (student_dir, (gradebook, sheet)), (result, content_hash) in zip(
+                students, outcomes, strict=True
+            ):
+                results.append(result)
+                if result.error is not None:
+                    continue
+                entry = cache.get(student_dir.name)
+                if result.cached and entry and entry[3] and not self.rewrite:
+                    written[gradebook].append((sheet, result))
+                else:
+                    to_write[gradebook].append((sheet, result))
+                rows.append((student_dir.name, content_hash, script_hash,
+                             result.model_dump_json(exclude={"cached"})))
+            for gradebook, writes in written.items():
+                to_write[gradebook].extend(_blank_results(gradebook, writes))
+            for gradebook, writes in to_write.items():
+                self._write_gradebook(gradebook, writes)
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, 1)", rows)
+        finally:
+            conn.close()
+        return results
+
+    def _gradebooks(self) -> dict[str, tuple[Path, str | None]]:
+        """
+        Associe le numéro de dossier Omnivox de chaque étudiant à sa grille: un
+        fichier par étudiant, ou une feuille du classeur unique.
+        """
+        single = self.gradebook_dir / SINGLE_WORKBOOK_NAME
+        if single.exists():
+            return {student_id: (single, sheet)
+                    for student_id, sheet in single_workbook_sheets(single).items()}
+        return {gradebook_student_id(p): (p, None) for p in self.gradebook_dir.glob("*.xlsx")
+                if not p.name.startswith("~$")}
+
+    def _run(self, student_dir: Path) -> AutogradeResult:
+        """
+        Exécute le script dans un processus séparé en appliquant les limites.
+        """
+        command = [str(self.script.resolve()), str(student_dir.resolve())]
+        if self.script.suffix == ".py":
+            command.insert(0, sys.executable)
+
+        kwargs: dict[str, Any] = {}
+        # Un groupe de processus séparé permet de tuer aussi les sous-processus
+        if os.name == "posix":
+            kwargs["start_new_session"] = True
+            if resource is not None and self.memory_mb is not None:
+                limit = self.memory_mb * 1024 * 1024
+                command = [sys.executable, "-c", _MEMORY_LIMIT_WRAPPER, str(limit), *command]
+        else:
+            kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP  # type: ignore[attr-defined]
+
+        try:
+            process = subprocess.Popen(
+                command, cwd=student_dir, stdin=subprocess.DEVNULL,
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                text=True, encoding="utf-8", errors="replace", **kwargs
+            )
+        except OSError as e:
+            return AutogradeResult(student=student_dir.name, error=str(e))
+
+        try:
+            stdout, stderr = process.communicate(timeout=self.timeout)
+        except subprocess.TimeoutExpired:
+            _kill(process)
+            # Un sous-processus qui aurait survécu garde les tuyaux ouverts: on n'attend pas
+            with contextlib.suppress(subprocess.TimeoutExpired):
+                process.communicate(timeout=_KILL_GRACE)
+            return AutogradeResult(student=student_dir.name,
+                                   error=f"Délai de {self.timeout:g} s dépassé")
+
+        if process.returncode != 0:
+            message = stderr.strip().splitlines()[-1] if stderr.strip() else ""
+            return AutogradeResult(
+                student=student_dir.name,
+                error=f"Code de sortie {process.returncode} {message}".strip()
+            )
+        lines = [line for line in stdout.splitlines() if line.strip()]
+        try:
+            values = json.loads(lines[-1]) if lines else None
+        except json.JSONDecodeError:
+            values = None
+        if not isinstance(values, dict):
+            return AutogradeResult(
+                student=student_dir.name,
+                error="La dernière ligne de la sortie n'est pas un objet JSON"
+            )
+        return AutogradeResult(student=student_dir.name, values=values)
+
+    def _write_gradebook(self, gradebook: Path,
+                         writes: list[tuple[str | None, AutogradeResult]]):
+        wb = openpyxl.load_workbook(gradebook)
+        for sheet, result in writes:
+            missing = write_named_values(wb, result.values, sheet)
+            where = gradebook if sheet is None else f"{gradebook} (feuille {sheet})"
+            for name in missing:
+                print(f"Avertissement: la plage nommée '{name}' n'existe pas dans {where}.")
+        wb.save(gradebook)
+
+    def _vprint(self, *args):
+        if self.verbose:
+            print(*args)
+
+
+def print_autograde_report(results: list[AutogradeResult]):
+    for result in results:
+        status = "cache" if result.cached else "exécuté"
+        if result.error:
+            print(f"{result.student} : ERREUR {result.error}")
+        else:
+            values = ", ".join(f"{k}={v}" for k, v in result.values.items())
+            print(f"{result.student} ({status}) : {values}")
+
+
+def submission_hash(folder: Path, paths_to_delete: list[str]) -> str:
+    """
+    Calcule une empreinte du contenu d'un dossier, en ignorant les fichiers à supprimer.
+    """
+    h = hashlib.sha256()
+    files = []
+    for root, dirnames, filenames in os.walk(folder):
+        dirnames[:] = [d for d in dirnames if not is_pruned(d, paths_to_delete)]
+        files.extend(os.path.join(root, name) for name in filenames
+                     if not is_pruned(name, paths_to_delete))
+    for path in sorted(files):
+        h.update(Path(path).relative_to(folder).as_posix().encode() + b"\0")
+        try:
+            with open(path, "rb") as f:
+                while chunk := f.read(1 << 20):
+                    h.update(chunk)
+        except OSError:
+            continue
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _blank_results(gradebook: Path, writes: list[tuple[str | None, AutogradeResult]]
+                   ) -> list[tuple[str | None, AutogradeResult]]:
+    """
+    Retourne les résultats déjà écrits dont toutes les cellules sont vides dans la
+    grille: elle a été régénérée, migrée ou remplacée par un classeur unique depuis.
+    """
+    try:
+        reader = XlsxReader(gradebook)
+    except Exception:
+        # Grille illisible (ouverte dans Excel, par exemple): on ne la touche pas
+        return []
+    blank = []
+    with reader:
+        for sheet, result in writes:
+            refs = [reader.named_cell(name, sheet) for name in result.values]
+            by_sheet: dict[str, set[str]] = defaultdict(set)
+            for ref in refs:
+                if ref is not None:
+                    by_sheet[ref[0]].add(ref[1])
+            values = [value for title, coordinates in by_sheet.items()
+                      for value in reader.read_cells(title, coordinates).values()]
+            if all(value in (None, "") for value in values):
+                blank.append((sheet, result))
+    return blank
+
+
+def _find_gradebook(folder_name: str, gradebooks: dict[str, tuple[Path, str | None]]
+                    ) -> tuple[Path, str | None] | None:
+    """
+    Trouve la grille d'un étudiant à partir du numéro de dossier présent dans le
+    nom de son dossier de remise.
+    """
+    for number in re.findall(r"\d+", folder_name):
+        if number in gradebooks:
+            return gradebooks[number]
+    return None
+
+
+def _kill(process: subprocess.Popen):
+    """
+    Tue le processus et tous ses sous-processus (npm, dotnet test, etc.).
+    """
+    if os.name == "posix":
+        with contextlib.suppress(ProcessLookupError):
+            os.killpg(process.pid, signal.SIGKILL)
+    else:
+        with contextlib.suppress(OSError, subprocess.TimeoutExpired):
+            subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)],
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                           timeout=_KILL_GRACE, check=False)
+        process.kill()
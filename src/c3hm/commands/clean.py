@@ -1,43 +1,183 @@
+import contextlib
+import os
 import shutil
+import stat
+import subprocess
+import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 from pydantic import BaseModel
 
+from c3hm.data.submission_index import (
+    SubmissionIndex,
+    folder_signature,
+    is_student_folder,
+    scan_folder,
+)
+
+TRASH_FOLDER_NAME = ".c3hm_corbeille"
 
 class Cleaner(BaseModel):
     verbose: bool = False
     folder: Path
     paths_to_delete: list[str]
+    fast: bool = False
+    workers: int = 8
+    force: bool = False
+    wait: bool = False
+    purge_only: bool = False
 
     def clean_folders(self):
         """
         Supprime les fichiers et dossiers indésirables.
+
+        Avec `fast`, la corbeille est vidée par un processus détaché: la commande
+        se termine dès que les dossiers étudiants sont propres. Avec `wait`, elle
+        est vidée avant de rendre la main.
         """
         if not self.folder.exists():
             raise FileNotFoundError(f"Le dossier {self.folder} n'existe pas.")
 
+        if self.purge_only:
+            self._purge_trash()
+            return
+
         self._vprint(f"Début du nettoyage de {self.folder}")
 
-        for archive in self.folder.glob("*"):
-            if archive.is_dir():
-                self._clean_folder(archive)
+        with SubmissionIndex(self.folder) as index:
+            for archive in self.folder.glob("*"):
+                if is_student_folder(archive):
+                    # Saute les dossiers qui n'ont pas changé depuis le dernier nettoyage.
+                    # Le calcul de la signature repère au passage ce qu'il faut supprimer.
+                    pruned: list[Path] = []
+                    signature = folder_signature(archive, self.paths_to_delete, pruned)
+                    if not self.force and index.cleaned_signature(archive.name) == signature:
+                        self._vprint(f"Inchangé depuis le dernier nettoyage : {archive}")
+                        continue
+                    self._clean_folder(archive, pruned)
+                    # Un fichier verrouillé qui n'a pas pu être supprimé sera réessayé
+                    stats = scan_folder(archive, self.paths_to_delete)
+                    index.update(stats, cleaned=stats.pruned_hits == 0)
+
+        # Vide la corbeille, y compris ce qui reste d'une exécution interrompue
+        if not self._trash.exists():
+            return
+        if self.fast and not self.wait:
+            self._spawn_purge()
+        else:
+            self._purge_trash()
+
+    @property
+    def _trash(self) -> Path:
+        # La corbeille doit être sur le même disque que les dossiers étudiants
+        # pour que le renommage soit instantané.
+        return self.folder / TRASH_FOLDER_NAME
 
-    def _clean_folder(self, path: Path):
+    def _clean_folder(self, path: Path, pruned: list[Path]):
         """
-        Supprime les fichiers et dossiers indésirables dans le dossier spécifié.
+        Supprime les fichiers et dossiers indésirables du dossier spécifié, repérés
+        lors du calcul de sa signature.
         """
         self._vprint(f"Nettoyage de l'archive : {path}")
 
         # Supprime les fichiers et dossiers indésirables
-        for item in path.rglob("*"):
-            if any(item.match(pat) for pat in self.paths_to_delete):
-                if item.is_dir():
-                    self._vprint(f"Suppression du dossier: {item}")
+        for item in pruned:
+            if item.is_dir() and not item.is_symlink():
+                self._vprint(f"Suppression du dossier: {item}")
+                if self.fast:
+                    self._move_to_trash(item)
+                else:
                     shutil.rmtree(item, ignore_errors=True)
-                elif item.is_file():
-                    self._vprint(f"Suppression du fichier: {item}")
+            elif item.is_file() or item.is_symlink():
+                self._vprint(f"Suppression du fichier: {item}")
+                with contextlib.suppress(OSError):
                     item.unlink()
 
+    def _move_to_trash(self, item: Path):
+        """
+        Déplace le dossier dans la corbeille. Si le renommage échoue (autre disque,
+        fichier verrouillé, etc.), on revient à la suppression normale.
+        """
+        self._trash.mkdir(exist_ok=True)
+        try:
+            item.rename(self._trash / f"{item.name}-{uuid.uuid4().hex}")
+        except OSError:
+            shutil.rmtree(item, ignore_errors=True)
+
+    def _spawn_purge(self):
+        """
+        Lance `c3hm clean --purge-only` dans un processus détaché qui survit à la
+        fin de la commande. Ce qui n'a pas été supprimé (processus interrompu,
+        fichier verrouillé) le sera au prochain nettoyage.
+        """
+        self._vprint(f"Vidage de la corbeille en arrière-plan : {self._trash}")
+        args = [sys.executable, "-c", "from c3hm.cli.cli import main; main()",
+                "clean", str(self.folder.resolve()), "--purge-only",
+                "--workers", str(self.workers)]
+        options: dict = {}
+        if os.name == "nt":
+            options["creationflags"] = (subprocess.DETACHED_PROCESS  # type: ignore[attr-defined]
+                                        | subprocess.CREATE_NEW_PROCESS_GROUP)  # type: ignore[attr-defined]
+        else:
+            options["start_new_session"] = True
+        try:
+            subprocess.Popen(args, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                             stderr=subprocess.DEVNULL, close_fds=True, **options)
+        except OSError as e:
+            self._vprint(f"Impossible de lancer le vidage en arrière-plan ({e})")
+            self._purge_trash()
+
+    def _purge_trash(self):
+        """
+        Vide la corbeille en supprimant les fichiers en parallèle. Les fichiers qui
+        n'ont pas pu être supprimés restent dans la corbeille jusqu'au prochain nettoyage.
+        """
+        trash = self._trash
+        if not trash.exists():
+            return
+        self._vprint(f"Vidage de la corbeille : {trash}")
+
+        files: list[str] = []
+        folders: list[str] = []
+        for root, dirnames, filenames in os.walk(trash, topdown=False):
+            files.extend(os.path.join(root, name) for name in filenames)
+            # os.walk ne suit pas les liens symboliques, il faut les supprimer comme des fichiers
+            files.extend(os.path.join(root, name) for name in dirnames
+                         if os.path.islink(os.path.join(root, name)))
+            folders.append(root)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for _ in pool.map(_force_unlink, files):
+                pass
+
+        # os.walk(topdown=False) liste les dossiers du plus profond au moins profond
+        for folder in folders:
+            with contextlib.suppress(OSError):
+                os.rmdir(folder)
+
+        if trash.exists():
+            self._vprint(f"La corbeille n'a pas pu être entièrement vidée : {trash}")
+
     def _vprint(self, *args):
         if self.verbose:
             print(*args)
+
+def _force_unlink(path: str):
+    """
+    Supprime un fichier, en retirant l'attribut lecture seule au besoin
+    (fréquent pour les objets .git sous Windows).
+    """
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    except PermissionError:
+        try:
+            os.chmod(path, stat.S_IWRITE)
+            os.unlink(path)
+        except OSError:
+            pass
+    except OSError:
+        pass
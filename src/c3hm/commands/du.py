@@ -0,0 +1,72 @@
+from pathlib import Path
+
+from c3hm.data.submission_index import (
+    FolderStats,
+    SubmissionIndex,
+    folder_signature,
+    is_student_folder,
+    scan_folder,
+)
+
+
+def disk_usage(folder: Path, paths_to_delete: list[str],
+               refresh: bool = False) -> list[tuple[FolderStats, bool]]:
+    """
+    Calcule l'espace disque utilisé par chaque dossier étudiant.
+
+    Les statistiques sont lues dans l'index lorsque le dossier n'a pas changé
+    depuis le dernier parcours. Retourne, pour chaque dossier, ses statistiques
+    et un booléen indiquant s'il a changé depuis le dernier nettoyage.
+    """
+    if not folder.exists():
+        raise FileNotFoundError(f"Le dossier {folder} n'existe pas.")
+
+    results = []
+    with SubmissionIndex(folder) as index:
+        present = set()
+        for path in sorted(folder.glob("*")):
+            if not is_student_folder(path):
+                continue
+            present.add(path.name)
+            signature = folder_signature(path, paths_to_delete)
+            stats = None if refresh else index.get(path.name)
+            if stats is None or stats.signature != signature:
+                stats = scan_folder(path, paths_to_delete)
+                index.update(stats)
+            changed = index.cleaned_signature(path.name) != stats.signature
+            results.append((stats, changed))
+
+        # Oublie les dossiers qui n'existent plus
+        for name in index.names():
+            if name not in present:
+                index.remove(name)
+    return results
+
+
+def print_disk_usage(results: list[tuple[FolderStats, bool]], top_extensions: int = 3):
+    """
+    Affiche un rapport d'utilisation du disque, du plus gros au plus petit dossier.
+    """
+    results = sorted(results, key=lambda r: r[0].size, reverse=True)
+    width = max([len(stats.name) for stats, _ in results] + [len("Dossier")])
+    print(f"{'Dossier':<{width}}  {'Taille':>10}  {'Fichiers':>8}  {'À supprimer':>11}  "
+          f"{'Modifié':>7}  Extensions")
+    for stats, changed in results:
+        exts = sorted(stats.extensions.items(), key=lambda e: e[1][1], reverse=True)
+        exts_str = ", ".join(f"{ext or '(aucune)'} {count}"
+                             for ext, (count, _) in exts[:top_extensions])
+        print(f"{stats.name:<{width}}  {format_size(stats.size):>10}  {stats.file_count:>8}  "
+              f"{format_size(stats.pruned_size):>11}  {'oui' if changed else 'non':>7}  "
+              f"{exts_str}")
+    total = sum(stats.size for stats, _ in results)
+    pruned = sum(stats.pruned_size for stats, _ in results)
+    print(f"{'Total':<{width}}  {format_size(total):>10}  "
+          f"{sum(stats.file_count for stats, _ in results):>8}  {format_size(pruned):>11}")
+
+
+def format_size(size: float) -> str:
+    for unit in ["o", "Ko", "Mo", "Go"]:
+        if size < 1024 or unit == "Go":
+            return f"{size:.0f} {unit}" if unit == "o" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} Go"
@@ -1,9 +1,14 @@
 from pathlib import Path
+from typing import Any
 
 import openpyxl
 from openpyxl.worksheet.table import Table, TableStyleInfo
 from openpyxl.worksheet.worksheet import Worksheet
 
+from c3hm.data.xlsx import XlsxReader
+
+CTHM_FIELDS = ["cthm_note", "cthm_matricule", "cthm_commentaire", "cthm_nom"]
+
 
 def generate_feedback(gradebook_path: Path, output_dir: Path):
     """
@@ -36,34 +41,21 @@ def generate_xl_for_omnivox(
     wb.save(omnivox_path)
 
 def populate_omnivox_sheet(gradebook_path: Path, ws: Worksheet) -> None:
+    fill_omnivox_sheet(ws, read_gradebooks(gradebook_path))
+
+def fill_omnivox_sheet(ws: Worksheet, students: list[dict[str, Any]]) -> None:
+    """
+    Remplit la feuille Omnivox à partir des valeurs `cthm_*` de chaque étudiant.
+    """
     ws.title = "Notes pour Omnivox"
     ws.sheet_view.showGridLines = False  # Disable gridlines
 
     # En-têtes
     ws.append(["Code omnivox", "Note", "Commentaire", "Nom"])
 
-    # Trouves tous les fichiers excel
-    xl_files = list(gradebook_path.glob("*.xlsx"))
-    for xl_file in xl_files:
-        xl_wb = openpyxl.load_workbook(xl_file, read_only=True, data_only=True)
-        # Check for defined range
-        if "cthm_matricule" not in xl_wb.defined_names:
-            print(f"Avertissement: Le fichier {xl_file} ne contient pas de "
-                  "plage nommée 'cthm_matricule'. Il sera ignoré.")
-            continue
-        d = {}
-        for x in ["cthm_note", "cthm_matricule", "cthm_commentaire", "cthm_nom"]:
-            named_range = xl_wb.defined_names[x]
-            title, dest = next(named_range.destinations)
-            x_ws = xl_wb[title]
-            cell = x_ws[dest]
-            d[x] = cell.value # type: ignore
-        note = d["cthm_note"]
-        note = parse_grade(note)
-        matricule = d["cthm_matricule"]
-        comment = d["cthm_commentaire"]
-        nom = d["cthm_nom"]
-        ws.append([matricule, note, comment, nom])
+    for d in students:
+        note = parse_grade(d["cthm_note"])
+        ws.append([d["cthm_matricule"], note, d["cthm_commentaire"], d["cthm_nom"]])
 
     # Format
     _insert_table(ws, "NotesOmnivox", "A1:D" + str(ws.max_row))
@@ -72,6 +64,52 @@ def populate_omnivox_sheet(gradebook_path: Path, ws: Worksheet) -> None:
     ws.column_dimensions["C"].width = 70
     ws.column_dimensions["D"].width = 40
 
+def read_gradebooks(gradebook_path: Path) -> list[dict[str, Any]]:
+    """
+    Lit les valeurs `cthm_*` de chaque étudiant dans les grilles du dossier.
+
+    Un fichier peut contenir une seule grille (plages nommées du classeur) ou une
+    feuille par étudiant (plages nommées propres à chaque feuille). Chaque feuille
+    n'est lue qu'une fois, et seulement jusqu'à la dernière cellule nécessaire.
+    """
+    students = []
+    for xl_file in sorted(gradebook_path.glob("*.xlsx")):
+        if xl_file.name.startswith("~$"):  # Fichier de verrouillage d'Excel
+            continue
+        with XlsxReader(xl_file) as reader:
+            sheets = [title for title in reader.sheets
+                      if "cthm_matricule" in reader.sheet_defined_names.get(title, {})]
+            if not sheets and "cthm_matricule" in reader.defined_names:
+                sheets = [None]
+            if not sheets:
+                print(f"Avertissement: Le fichier {xl_file} ne contient pas de "
+                      "plage nommée 'cthm_matricule'. Il sera ignoré.")
+                continue
+            for sheet in sheets:
+                students.append(read_student_values(reader, CTHM_FIELDS, sheet))
+    return students
+
+
+def read_student_values(reader: XlsxReader, names: list[str],
+                        sheet: str | None = None) -> dict[str, Any]:
+    """
+    Lit les plages nommées d'une grille. Les cellules d'une même feuille sont lues
+    en un seul passage.
+    """
+    by_sheet: dict[str, dict[str, str]] = {}
+    for name in names:
+        ref = reader.named_cell(name, sheet)
+        if ref is not None:
+            title, coord = ref
+            by_sheet.setdefault(title, {})[name] = coord
+    values: dict[str, Any] = dict.fromkeys(names)
+    for title, coords in by_sheet.items():
+        cells = reader.read_cells(title, set(coords.values()))
+        for name, coord in coords.items():
+            values[name] = cells[coord.upper()]
+    return values
+
+
 def parse_grade(note: str | float | int | None) -> float | None:
     if isinstance(note, float | int | None):
         return note
@@ -1,14 +1,30 @@
+import copy
+import re
 import shutil
 from pathlib import Path
+from typing import Any
 
 import openpyxl
+from openpyxl.utils import absolute_coordinate, quote_sheetname
+from openpyxl.workbook.defined_name import DefinedName
+from openpyxl.workbook.workbook import Workbook
+from openpyxl.worksheet.worksheet import Worksheet
 
-from c3hm.data.student import read_omnivox_students_file
+from c3hm.data.student import Student, read_omnivox_students_file
 
+SINGLE_WORKBOOK_NAME = "grilles.xlsx"
+ARCHIVE_FOLDER_NAME = "archives"
 
-def generate_gradebook(rubric: Path, students_file: Path, output_dir: Path) -> None:
+_INVALID_TITLE_CHARS = re.compile(r"[\\/*?:\[\]]")
+
+
+def generate_gradebook(rubric: Path, students_file: Path, output_dir: Path,
+                       single_workbook: bool = False) -> None:
     """
     Génère les grilles de correction à partir du fichier de configuration.
+
+    Par défaut, chaque étudiant a son propre fichier. Avec `single_workbook`, un seul
+    classeur est créé avec une feuille par étudiant.
     """
     if not output_dir.exists():
         output_dir.mkdir(parents=True, exist_ok=True)
@@ -16,20 +32,184 @@ def generate_gradebook(rubric: Path, students_file: Path, output_dir: Path) -> N
         raise NotADirectoryError(f"{output_dir} est un fichier et non un répertoire.")
 
     students = read_omnivox_students_file(students_file)
+    if single_workbook:
+        generate_single_gradebook(rubric, students, output_dir / SINGLE_WORKBOOK_NAME)
+        return
+
+    for student in students:
+        create_student_gradebook(rubric, student, output_dir)
+
+
+def create_student_gradebook(rubric: Path, student: Student, output_dir: Path) -> Path:
+    """
+    Copie la grille pour un étudiant et y inscrit son matricule et son nom.
+    """
+    destination = output_dir / gradebook_file_name(student)
+    shutil.copyfile(rubric, destination)
+
+    # Open file and fill in student info
+    wb = openpyxl.load_workbook(destination)
+
+    write_named_values(wb, {
+        "cthm_matricule": int(student.omnivox_id),
+        "cthm_nom": f"{student.first_name} {student.last_name}",
+    })
+
+    wb.save(destination)
+    return destination
+
+
+def sync_gradebook(rubric: Path, students_file: Path, output_dir: Path) -> None:
+    """
+    Met à jour un dossier de grilles existant selon la liste d'étudiants.
+
+    Les étudiants sont reconnus par leur numéro de dossier Omnivox, lu dans le nom
+    des fichiers: aucune grille existante n'est ouverte ni modifiée. Seules les
+    grilles manquantes sont créées, et celles des étudiants qui ne sont plus dans
+    la liste sont déplacées dans le dossier `archives` (et en sont ressorties si
+    l'étudiant revient).
+    """
+    if not output_dir.exists():
+        generate_gradebook(rubric, students_file, output_dir)
+        return
+    if output_dir.is_file():
+        raise NotADirectoryError(f"{output_dir} est un fichier et non un répertoire.")
+    if (output_dir / SINGLE_WORKBOOK_NAME).exists():
+        raise ValueError(
+            f"{output_dir} contient un classeur unique ({SINGLE_WORKBOOK_NAME}). "
+            "La synchronisation ne fonctionne qu'avec un fichier par étudiant."
+        )
+
+    existing = {}
+    for path in output_dir.glob("*.xlsx"):
+        student_id = gradebook_student_id(path)
+        if not path.name.startswith("~$") and student_id.isdigit():
+            existing[student_id] = path
+
+    students = {s.omnivox_id: s for s in read_omnivox_students_file(students_file)}
+
+    archive_dir = output_dir / ARCHIVE_FOLDER_NAME
+    for student_id in sorted(students.keys() - existing.keys()):
+        # Un étudiant réinscrit retrouve sa grille archivée la plus récente, avec
+        # ses notes, sous son nom habituel (sans le suffixe _2 de l'archivage)
+        archived = [p for p in archive_dir.glob(f"* {student_id}*.xlsx")
+                    if gradebook_student_id(p).split("_")[0] == student_id]
+        if archived:
+            latest = max(archived, key=lambda p: p.stat().st_mtime)
+            destination = output_dir / gradebook_file_name(students[student_id])
+            latest.rename(destination)
+            print(f"Restauration : {destination.name}")
+            continue
+        destination = create_student_gradebook(rubric, students[student_id], output_dir)
+        print(f"Ajout : {destination.name}")
+
+    dropped = sorted(existing.keys() - students.keys())
+    if dropped:
+        archive_dir.mkdir(exist_ok=True)
+        for student_id in dropped:
+            path = existing[student_id]
+            destination = archive_dir / path.name
+            i = 2
+            while destination.exists():
+                destination = archive_dir / f"{path.stem}_{i}{path.suffix}"
+                i += 1
+            path.rename(destination)
+            print(f"Archivage : {path.name}")
+
+
+def generate_single_gradebook(rubric: Path, students: list[Student], destination: Path) -> None:
+    """
+    Génère un seul classeur contenant une copie de la grille par étudiant.
+
+    Les plages nommées `cthm_*` du modèle deviennent des plages propres à chaque
+    feuille: `cthm_note` de la feuille d'un étudiant désigne sa propre note.
+    """
+    wb = openpyxl.load_workbook(rubric)
+    if "cthm_matricule" not in wb.defined_names:
+        raise ValueError(f"Le modèle {rubric} ne contient pas de plage nommée 'cthm_matricule'.")
+
+    template_title, _ = next(wb.defined_names["cthm_matricule"].destinations)
+    template = wb[template_title]
+    names: dict[str, str] = {}
+    for name in [n for n in wb.defined_names if n.startswith("cthm_")]:
+        title, coord = next(wb.defined_names[name].destinations)
+        if title == template_title:
+            names[name] = coord
+            del wb.defined_names[name]
+
+    titles: set[str] = set()
     for student in students:
-        stem = f"{student.last_name} {student.first_name} {student.omnivox_id}.xlsx"
-        destination = output_dir / stem
-        shutil.copyfile(rubric, destination)
-
-        # Open file and fill in student info
-        wb = openpyxl.load_workbook(destination)
-
-        for name, value in [("cthm_matricule", int(student.omnivox_id)),
-                            ("cthm_nom", f"{student.first_name} {student.last_name}")]:
-            named_range = wb.defined_names[name]
-            for title, dest in named_range.destinations:
-                ws = wb[title]
-                cell = ws[dest]
-                cell.value = value # type: ignore
-
-        wb.save(destination)
+        ws = wb.copy_worksheet(template)
+        ws.title = _unique_sheet_title(f"{student.last_name} {student.first_name}", titles)
+        ws.sheet_view.showGridLines = template.sheet_view.showGridLines
+        _copy_validations_and_formatting(template, ws)
+        for name, coord in names.items():
+            ws.defined_names[name] = DefinedName(
+                name, attr_text=f"{quote_sheetname(ws.title)}!{absolute_coordinate(coord)}"
+            )
+        ws[names["cthm_matricule"]].value = int(student.omnivox_id)
+        if "cthm_nom" in names:
+            ws[names["cthm_nom"]].value = student.full_name()
+
+    wb.remove(template)
+    wb.save(destination)
+
+
+def _copy_validations_and_formatting(source: Worksheet, target: Worksheet) -> None:
+    """
+    `copy_worksheet` ne copie ni les validations de données ni la mise en forme
+    conditionnelle: elles sont recopiées ici.
+    """
+    for validation in source.data_validations.dataValidation:
+        target.add_data_validation(copy.deepcopy(validation))
+    for formatting in source.conditional_formatting:
+        for rule in formatting.rules:
+            target.conditional_formatting.add(str(formatting.sqref), copy.deepcopy(rule))
+
+
+def _unique_sheet_title(title: str, used: set[str]) -> str:
+    """
+    Excel limite les noms de feuilles à 31 caractères, sans certains caractères
+    spéciaux, et ne distingue pas les majuscules des minuscules.
+    """
+    base = _INVALID_TITLE_CHARS.sub("_", title).strip("'")[:31] or "Feuille"
+    candidate = base
+    i = 2
+    while candidate.lower() in used:
+        suffix = f" ({i})"
+        candidate = base[:31 - len(suffix)] + suffix
+        i += 1
+    used.add(candidate.lower())
+    return candidate
+
+
+def gradebook_file_name(student: Student) -> str:
+    return f"{student.last_name} {student.first_name} {student.omnivox_id}.xlsx"
+
+
+def gradebook_student_id(path: Path) -> str:
+    """
+    Retourne le numéro de dossier Omnivox d'une grille à partir du nom du fichier.
+    """
+    return path.stem.rsplit(" ", maxsplit=1)[-1]
+
+
+def write_named_values(wb: Workbook, values: dict[str, Any],
+                       sheet: str | None = None) -> list[str]:
+    """
+    Écrit chaque valeur dans les cellules de la plage nommée correspondante.
+    Avec `sheet`, seules les plages propres à cette feuille sont utilisées
+    (classeur unique). Retourne la liste des noms introuvables.
+    """
+    defined_names = wb.defined_names if sheet is None else wb[sheet].defined_names
+    missing = []
+    for name, value in values.items():
+        if name not in defined_names:
+            missing.append(name)
+            continue
+        named_range = defined_names[name]
+        for title, dest in named_range.destinations:
+            ws = wb[title]
+            cell = ws[dest]
+            cell.value = value # type: ignore
+    return missing
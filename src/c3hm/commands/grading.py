@@ -0,0 +1,245 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from openpyxl.utils import get_column_letter
+from pydantic import BaseModel
+
+from c3hm.commands.feedback import parse_grade
+from c3hm.data.rubric import CTHM_NAMES, RubricLayout, load_rubric_layout
+from c3hm.data.xlsx import XlsxReader, range_coordinates
+
+# Nombre de grilles par processus en deçà duquel la lecture reste séquentielle:
+# la lecture d'une grille prend quelques millisecondes, moins que le démarrage d'un processus.
+FILES_PER_PROCESS = 100
+
+
+class IndicatorState(BaseModel):
+    """
+    Saisie de l'enseignant pour un indicateur d'une grille.
+    """
+    criterion: str
+    label: str
+    points: float | None = None
+    levels: list[int] = []  # Indices des niveaux choisis
+    grade: float | None = None
+    comment: str | None = None
+
+    @property
+    def is_missing(self) -> bool:
+        return not self.levels
+
+    @property
+    def is_conflict(self) -> bool:
+        # Plusieurs niveaux choisis: Excel affiche #N/A
+        return len(self.levels) > 1
+
+
+class GradebookState(BaseModel):
+    """
+    État de la correction d'un étudiant, lu directement dans le XML de la feuille.
+    """
+    path: Path
+    sheet: str
+    values: dict[str, Any]
+    indicators: list[IndicatorState]
+    bonus: float | None = None
+
+    @property
+    def matricule(self) -> str:
+        value = self.values.get("cthm_matricule")
+        return "" if value is None else str(value)
+
+    @property
+    def name(self) -> str:
+        value = self.values.get("cthm_nom")
+        return "" if value is None else str(value)
+
+    @property
+    def missing(self) -> list[IndicatorState]:
+        return [i for i in self.indicators if i.is_missing]
+
+    @property
+    def conflicts(self) -> list[IndicatorState]:
+        return [i for i in self.indicators if i.is_conflict]
+
+    @property
+    def has_comment(self) -> bool:
+        comment = self.values.get("cthm_commentaire")
+        return comment is not None and str(comment).strip() != ""
+
+    @property
+    def is_complete(self) -> bool:
+        return not self.missing and not self.conflicts and self.has_comment
+
+    @property
+    def grade(self) -> float | None:
+        """
+        Note de l'étudiant. La valeur calculée par Excel est utilisée si elle est
+        disponible, sinon la note est recalculée à partir des niveaux choisis
+        (par exemple pour une grille modifiée par c3hm et pas encore ouverte dans Excel).
+        """
+        note = self.values.get("cthm_note")
+        if note not in (None, ""):
+            try:
+                return parse_grade(note)
+            except ValueError:
+                pass
+        if self.conflicts:
+            return None
+        return sum(i.grade or 0 for i in self.indicators) + (self.bonus or 0)
+
+
+def gradebook_files(folder: Path) -> list[Path]:
+    """
+    Liste les grilles d'un dossier, sans les fichiers de verrouillage d'Excel.
+    """
+    return sorted(p for p in folder.glob("*.xlsx") if not p.name.startswith("~$"))
+
+
+def single_workbook_sheets(path: Path) -> dict[str, str]:
+    """
+    Associe le numéro de dossier Omnivox de chaque étudiant d'un classeur unique
+    (`gradebook --single`) au titre de sa feuille, lu dans `cthm_matricule`.
+    """
+    sheets = {}
+    with XlsxReader(path) as reader:
+        for title, names in reader.sheet_defined_names.items():
+            if "cthm_matricule" not in names:
+                continue
+            ref = reader.named_cell("cthm_matricule", title)
+            if ref is None:
+                continue
+            value = reader.read_cells(ref[0], {ref[1]}).get(ref[1].upper())
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            if value not in (None, ""):
+                sheets[str(value)] = title
+    return sheets
+
+
+def find_rubric_layout(folder: Path, rubric: Path | None = None) -> RubricLayout:
+    """
+    Charge la disposition de la grille, à partir du modèle s'il est fourni,
+    sinon à partir de la première grille du dossier.
+    """
+    if rubric is not None:
+        return load_rubric_layout(rubric)
+    for path in gradebook_files(folder):
+        try:
+            return load_rubric_layout(path)
+        except ValueError:
+            continue
+    raise FileNotFoundError(f"Aucune grille trouvée dans le dossier {folder}.")
+
+
+def read_gradebook_states(path: Path, layout: RubricLayout) -> list[GradebookState]:
+    """
+    Lit l'état de chaque grille d'un fichier: une grille si les plages nommées
+    sont celles du classeur, une par feuille si elles sont propres à chaque feuille.
+    Seules les cellules nommées et la plage des indicateurs sont lues.
+    """
+    states = []
+    with XlsxReader(path) as reader:
+        sheets: list[str | None] = [
+            title for title in reader.sheets
+            if "cthm_matricule" in reader.sheet_defined_names.get(title, {})
+        ]
+        if not sheets and "cthm_matricule" in reader.defined_names:
+            sheets = [None]
+        for sheet in sheets:
+            states.append(_read_state(reader, layout, sheet))
+    return states
+
+
+def read_many_gradebook_states(paths: list[Path], layout: RubricLayout,
+                               workers: int | None = None
+                               ) -> list[tuple[list[GradebookState], str | None]]:
+    """
+    Lit l'état des grilles de plusieurs fichiers. Retourne, pour chaque fichier,
+    ses grilles et le message d'erreur s'il n'a pas pu être lu.
+
+    La lecture du XML est limitée par le GIL: les fichiers sont répartis entre
+    plusieurs processus lorsqu'il y en a assez pour que ce soit rentable.
+    """
+    if workers is None:
+        workers = min(os.cpu_count() or 1, len(paths) // FILES_PER_PROCESS)
+    if workers <= 1:
+        return [_read_states_or_error(path, layout) for path in paths]
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_read_states_or_error, paths, [layout] * len(paths),
+                             chunksize=chunksize))
+
+
+def _read_states_or_error(path: Path, layout: RubricLayout
+                          ) -> tuple[list[GradebookState], str | None]:
+    try:
+        return read_gradebook_states(path, layout), None
+    except Exception as e:
+        return [], str(e)
+
+
+def _read_state(reader: XlsxReader, layout: RubricLayout, sheet: str | None) -> GradebookState:
+    refs = {name: reader.named_cell(name, sheet) for name in CTHM_NAMES}
+    matricule = refs["cthm_matricule"]
+    title = matricule[0] if matricule is not None else layout.sheet
+
+    # Les cellules nommées et la plage des indicateurs sont lues en un seul passage
+    coordinates = range_coordinates(layout.grading_range()) | {
+        ref[1] for ref in refs.values() if ref is not None and ref[0] == title
+    }
+    cells = reader.read_cells_formats(title, coordinates)
+
+    values: dict[str, Any] = {}
+    for name, ref in refs.items():
+        if ref is None:
+            values[name] = None
+        elif ref[0] == title:
+            values[name] = cells[ref[1].upper()][0]
+        else:
+            values[name] = reader.read_cells(ref[0], {ref[1]})[ref[1].upper()]
+
+    def cell(row: int, column: int) -> tuple[Any, str]:
+        return cells.get(f"{get_column_letter(column)}{row}", (None, "General"))
+
+    indicators = []
+    for criterion, indicator in layout.indicators:
+        state = IndicatorState(criterion=criterion.label, label=indicator.label,
+                               points=indicator.points)
+        for level, column in enumerate(layout.level_columns):
+            value, number_format = cell(indicator.row, column)
+            if value in (None, ""):
+                continue
+            state.levels.append(level)
+            state.grade = _level_grade(layout, indicator.points, level, value, number_format)
+        if state.is_conflict:
+            state.grade = None
+        comment = cell(indicator.row, layout.comment_column)[0]
+        state.comment = None if comment in (None, "") else str(comment)
+        indicators.append(state)
+
+    bonus = None
+    if layout.bonus_row is not None:
+        value = cell(layout.bonus_row, layout.grade_column)[0]
+        bonus = value if isinstance(value, int | float) else None
+
+    return GradebookState(path=reader.path, sheet=title, values=values,
+                          indicators=indicators, bonus=bonus)
+
+
+def _level_grade(layout: RubricLayout, points: float | None, level: int,
+                 value: Any, number_format: str) -> float | None:
+    """
+    Même calcul que la formule de la grille: un niveau coché (texte) donne son
+    pourcentage des points, un pourcentage est appliqué aux points et un nombre
+    est pris tel quel.
+    """
+    if isinstance(value, bool) or not isinstance(value, int | float):
+        if points is None or level >= len(layout.level_factors):
+            return None
+        return points * layout.level_factors[level]
+    if "%" in number_format:
+        return None if points is None else points * value
+    return value
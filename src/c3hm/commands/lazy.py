@@ -0,0 +1,203 @@
+import os
+import shutil
+import sqlite3
+import time
+import zipfile
+from pathlib import Path, PurePosixPath
+
+from c3hm.data.submission_index import is_pruned
+
+LAZY_INDEX_FILE_NAME = ".c3hm_lazy.sqlite"
+CACHE_FOLDER_NAME = ".c3hm_cache"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archives (
+    student TEXT PRIMARY KEY,
+    archive TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    student TEXT NOT NULL REFERENCES archives(student) ON DELETE CASCADE,
+    path TEXT NOT NULL,
+    member TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (student, path)
+);
+CREATE TABLE IF NOT EXISTS cache (
+    student TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_access REAL NOT NULL,
+    PRIMARY KEY (student, path)
+);
+"""
+
+
+class LazyIndex:
+    """
+    Index des archives des étudiants pour l'extraction à la demande.
+
+    Seul le répertoire central de chaque archive .zip est lu: noms, tailles et
+    chemins après aplatissement des dossiers uniques. Les fichiers sont extraits
+    au besoin dans un dossier cache de taille bornée, en retirant d'abord les
+    fichiers consultés le moins récemment.
+    """
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self.cache_folder = folder / CACHE_FOLDER_NAME
+        self._conn = sqlite3.connect(folder / LAZY_INDEX_FILE_NAME)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> "LazyIndex":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+    def add_archive(self, student: str, archive: Path, paths_to_delete: list[str]) -> int:
+        """
+        Indexe une archive. Retourne le nombre de fichiers indexés.
+
+        Les fichiers déjà extraits pour cet étudiant sont retirés du cache: ils
+        peuvent provenir d'une remise précédente.
+        """
+        with zipfile.ZipFile(archive) as z:
+            members = [
+                (info.filename, info.file_size) for info in z.infolist()
+                if not info.is_dir() and _is_safe_member(info.filename) and not any(
+                    is_pruned(part, paths_to_delete) for part in PurePosixPath(info.filename).parts
+                )
+            ]
+        prefix = _flatten_prefix([name for name, _ in members])
+        with self._conn:
+            self._conn.execute("DELETE FROM archives WHERE student = ?", (student,))
+            self._conn.execute("DELETE FROM cache WHERE student = ?", (student,))
+            self._conn.execute("INSERT INTO archives VALUES (?, ?)",
+                               (student, archive.relative_to(self.folder).as_posix()))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)",
+                [(student, name[len(prefix):], name, size) for name, size in members]
+            )
+        shutil.rmtree(self.cache_folder / student, ignore_errors=True)
+        return len(members)
+
+    def students(self) -> list[str]:
+        return [row[0] for row in self._conn.execute("SELECT student FROM archives ORDER BY 1")]
+
+    def find_student(self, query: str) -> str:
+        """
+        Trouve un étudiant à partir de son nom complet ou d'une partie de son nom
+        (par exemple son numéro de dossier).
+        """
+        students = self.students()
+        if query in students:
+            return query
+        matches = [s for s in students if query.lower() in s.lower()]
+        if not matches:
+            raise ValueError(f"Aucun étudiant ne correspond à '{query}'.")
+        if len(matches) > 1:
+            raise ValueError(f"Plusieurs étudiants correspondent à '{query}' : "
+                             + ", ".join(matches))
+        return matches[0]
+
+    def open(self, student: str, path: str = "", max_cache_size: int | None = None) -> Path:
+        """
+        Extrait le fichier ou le sous-dossier demandé dans le cache et retourne
+        son chemin. Les fichiers déjà présents dans le cache ne sont pas réextraits.
+        """
+        row = self._conn.execute(
+            "SELECT archive FROM archives WHERE student = ?", (student,)
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"L'étudiant '{student}' n'est pas dans l'index.")
+        archive = self.folder / row[0]
+
+        path = path.strip("/")
+        entries = self._conn.execute(
+            "SELECT path, member, size FROM entries WHERE student = ? "
+            "AND (? = '' OR path = ? OR substr(path, 1, ?) = ?)",
+            (student, path, path, len(path) + 1, path + "/")
+        ).fetchall()
+        if not entries:
+            raise FileNotFoundError(f"'{path}' n'existe pas dans la remise de {student}.")
+
+        student_cache = self.cache_folder / student
+        now = time.time()
+        with zipfile.ZipFile(archive) as z:
+            for rel_path, member, size in entries:
+                destination = student_cache / rel_path
+                if not destination.exists():
+                    destination.parent.mkdir(parents=True, exist_ok=True)
+                    with z.open(member) as src, open(destination, "wb") as dst:
+                        shutil.copyfileobj(src, dst, 1024 * 1024)
+                with self._conn:
+                    self._conn.execute("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?)",
+                                       (student, rel_path, size, now))
+
+        if max_cache_size is not None:
+            self._evict(max_cache_size, keep_after=now)
+        return student_cache / path if path else student_cache
+
+    def _evict(self, max_cache_size: int, keep_after: float):
+        """
+        Retire du cache les fichiers consultés le moins récemment jusqu'à ce que
+        la taille totale respecte la limite. Les fichiers qui viennent d'être
+        demandés ne sont jamais retirés.
+        """
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        if total <= max_cache_size:
+            return
+        rows = self._conn.execute(
+            "SELECT student, path, size FROM cache WHERE last_access < ? ORDER BY last_access",
+            (keep_after,)
+        ).fetchall()
+        removed = []
+        for student, rel_path, size in rows:
+            if total <= max_cache_size:
+                break
+            file_path = self.cache_folder / student / rel_path
+            try:
+                file_path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue
+            _remove_empty_parents(file_path.parent, self.cache_folder)
+            removed.append((student, rel_path))
+            total -= size
+        with self._conn:
+            self._conn.executemany("DELETE FROM cache WHERE student = ? AND path = ?", removed)
+
+
+def _flatten_prefix(names: list[str]) -> str:
+    """
+    Retourne le préfixe de dossiers uniques que `unpack` aplatirait: tant que le
+    niveau courant ne contient qu'un seul dossier et aucun fichier, on descend.
+    """
+    prefix = ""
+    while True:
+        level = {name[len(prefix):].split("/", 1)[0] for name in names}
+        has_files = any("/" not in name[len(prefix):] for name in names)
+        if len(level) != 1 or has_files:
+            return prefix
+        prefix += level.pop() + "/"
+
+
+def _is_safe_member(name: str) -> bool:
+    # Refuse les chemins qui sortiraient du dossier cache
+    path = PurePosixPath(name.replace("\\", "/"))
+    return not path.is_absolute() and ".." not in path.parts and ":" not in name
+
+
+def _remove_empty_parents(folder: Path, stop: Path):
+    while folder != stop and stop in folder.parents:
+        try:
+            os.rmdir(folder)
+        except OSError:
+            return
+        folder = folder.parent
@@ -0,0 +1,253 @@
+import hashlib
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from xml.etree.ElementTree import fromstring
+
+import openpyxl
+from openpyxl.packaging.custom import StringProperty
+from openpyxl.worksheet.worksheet import Worksheet
+from pydantic import BaseModel
+
+from c3hm.commands.gradebook import SINGLE_WORKBOOK_NAME
+from c3hm.data.rubric import RubricLayout, load_rubric_layout, read_rubric_layout
+
+# Propriété du classeur qui indique la grille ayant servi à la dernière migration
+STAMP_PROPERTY = "c3hm_grille"
+
+# Valeurs saisies par l'enseignant dans l'en-tête, conservées lors de la migration
+MIGRATED_NAMES = ["cthm_matricule", "cthm_nom", "cthm_commentaire"]
+
+
+class RubricMapping(BaseModel):
+    """
+    Correspondance entre l'ancienne et la nouvelle grille.
+    """
+    rows: dict[int, int]
+    levels: dict[int, int]
+    removed: list[str] = []
+    added: list[str] = []
+
+
+class MigrationResult(BaseModel):
+    path: Path
+    status: str
+    conflicts: list[str] = []
+
+
+def migrate_gradebooks(old_rubric: Path, new_rubric: Path, gradebook_dir: Path,
+                       dry_run: bool = False, workers: int | None = None
+                       ) -> tuple[RubricMapping, list[MigrationResult]]:
+    """
+    Transpose toutes les grilles remplies vers une nouvelle version du modèle, en
+    conservant les niveaux choisis et les commentaires.
+
+    Les indicateurs sont associés par libellé (dans le même critère, puis dans toute
+    la grille), puis par position. Les grilles sont traitées en parallèle. Une grille
+    déjà migrée vers ce modèle, ou dont le contenu ne changerait pas, n'est pas réécrite.
+    """
+    if not gradebook_dir.exists():
+        raise FileNotFoundError(f"Le dossier {gradebook_dir} n'existe pas.")
+
+    old_layout = load_rubric_layout(old_rubric)
+    new_layout = load_rubric_layout(new_rubric)
+    mapping = map_rubrics(old_layout, new_layout)
+    stamp = hashlib.sha256(new_rubric.read_bytes()).hexdigest()
+
+    paths = sorted(p for p in gradebook_dir.glob("*.xlsx")
+                   if not p.name.startswith("~$") and p.resolve() not in
+                   (old_rubric.resolve(), new_rubric.resolve()))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(
+            migrate_gradebook,
+            paths,
+            [new_rubric] * len(paths),
+            [old_layout] * len(paths),
+            [new_layout] * len(paths),
+            [mapping] * len(paths),
+            [stamp] * len(paths),
+            [dry_run] * len(paths),
+        ))
+    return mapping, results
+
+
+def map_rubrics(old: RubricLayout, new: RubricLayout) -> RubricMapping:
+    """
+    Associe chaque indicateur de l'ancienne grille à un indicateur de la nouvelle.
+    """
+    old_indicators = old.indicators
+    new_indicators = new.indicators
+    rows: dict[int, int] = {}
+    used: set[int] = set()
+
+    def assign(old_row: int, new_row: int):
+        rows[old_row] = new_row
+        used.add(new_row)
+
+    # 1. Même critère et même libellé
+    new_by_key = {(c.label, i.label): i.row for c, i in new_indicators}
+    for c, i in old_indicators:
+        new_row = new_by_key.get((c.label, i.label))
+        if new_row is not None and new_row not in used:
+            assign(i.row, new_row)
+
+    # 2. Même libellé, si ce libellé est unique dans la nouvelle grille
+    labels = [i.label for _, i in new_indicators]
+    new_by_label = {i.label: i.row for _, i in new_indicators if labels.count(i.label) == 1}
+    for _, i in old_indicators:
+        new_row = new_by_label.get(i.label)
+        if i.row not in rows and new_row is not None and new_row not in used:
+            assign(i.row, new_row)
+
+    # 3. Même position (ex: correction d'une coquille dans le libellé)
+    new_by_position = {(ci, ii): i.row for ci, c in enumerate(new.criteria)
+                       for ii, i in enumerate(c.indicators)}
+    for ci, c in enumerate(old.criteria):
+        for ii, i in enumerate(c.indicators):
+            new_row = new_by_position.get((ci, ii))
+            if i.row not in rows and new_row is not None and new_row not in used:
+                assign(i.row, new_row)
+
+    # Niveaux: par position si le nombre de niveaux est le même, sinon par libellé
+    if old.nb_levels == new.nb_levels:
+        levels = dict(zip(old.level_columns, new.level_columns, strict=True))
+    else:
+        new_levels = dict(zip(new.level_labels, new.level_columns, strict=True))
+        levels = {col: new_levels[label]
+                  for label, col in zip(old.level_labels, old.level_columns, strict=True)
+                  if label in new_levels}
+
+    return RubricMapping(
+        rows=rows,
+        levels=levels,
+        removed=[f"{c.label} / {i.label}" for c, i in old_indicators if i.row not in rows],
+        added=[f"{c.label} / {i.label}" for c, i in new_indicators if i.row not in used],
+    )
+
+
+def migrate_gradebook(path: Path, new_rubric: Path, old_layout: RubricLayout,
+                      new_layout: RubricLayout, mapping: RubricMapping, stamp: str,
+                      dry_run: bool = False) -> MigrationResult:
+    """
+    Transpose une grille remplie vers la nouvelle grille.
+    """
+    if path.name == SINGLE_WORKBOOK_NAME:
+        return MigrationResult(path=path, status="ignorée", conflicts=[
+            "La migration d'un classeur unique n'est pas prise en charge."
+        ])
+    try:
+        if read_stamp(path) == stamp:
+            return MigrationResult(path=path, status="déjà migrée")
+
+        old_wb = openpyxl.load_workbook(path)
+        layout = read_rubric_layout(old_wb)
+    except Exception as e:
+        return MigrationResult(path=path, status="erreur", conflicts=[str(e)])
+
+    if _layout_signature(layout) != _layout_signature(old_layout):
+        return MigrationResult(path=path, status="ignorée", conflicts=[
+            "La grille ne correspond pas à l'ancien modèle."
+        ])
+
+    old_ws = old_wb[layout.sheet]
+    new_wb = openpyxl.load_workbook(new_rubric)
+    new_ws = new_wb[new_layout.sheet]
+    conflicts: list[str] = []
+
+    for name in MIGRATED_NAMES:
+        if name in layout.named_cells and name in new_layout.named_cells:
+            new_ws[new_layout.named_cells[name]].value = old_ws[layout.named_cells[name]].value
+
+    new_points = {i.row: i.points for _, i in new_layout.indicators}
+    for criterion, indicator in layout.indicators:
+        name = f"{criterion.label} / {indicator.label}"
+        columns = [*layout.level_columns, layout.comment_column]
+        entered = [col for col in columns
+                   if old_ws.cell(row=indicator.row, column=col).value not in (None, "")]
+        if not entered:
+            continue
+        new_row = mapping.rows.get(indicator.row)
+        if new_row is None:
+            conflicts.append(f"« {name} » a été retiré: la saisie est perdue.")
+            continue
+        for col in entered:
+            source = old_ws.cell(row=indicator.row, column=col)
+            new_col = (new_layout.comment_column if col == layout.comment_column
+                       else mapping.levels.get(col))
+            if new_col is None:
+                conflicts.append(f"« {name} »: le niveau choisi n'existe plus.")
+                continue
+            _copy_cell(source, new_ws, new_row, new_col)
+            # Une note saisie en points ne suit pas un changement de pondération
+            if (col != layout.comment_column
+                    and isinstance(source.value, int | float)
+                    and "%" not in source.number_format
+                    and new_points.get(new_row) != indicator.points):
+                conflicts.append(f"« {name} »: la pondération a changé, "
+                                 "vérifier les points saisis.")
+
+    if layout.bonus_row is not None and new_layout.bonus_row is not None:
+        for old_col, new_col in [(layout.grade_column, new_layout.grade_column),
+                                 (layout.comment_column, new_layout.comment_column)]:
+            source = old_ws.cell(row=layout.bonus_row, column=old_col)
+            _copy_cell(source, new_ws, new_layout.bonus_row, new_col)
+
+    if _sheet_values(old_ws) == _sheet_values(new_ws):
+        return MigrationResult(path=path, status="inchangée", conflicts=conflicts)
+    if dry_run:
+        return MigrationResult(path=path, status="à migrer", conflicts=conflicts)
+
+    if STAMP_PROPERTY in new_wb.custom_doc_props.names:
+        del new_wb.custom_doc_props[STAMP_PROPERTY]
+    new_wb.custom_doc_props.append(StringProperty(name=STAMP_PROPERTY, value=stamp))
+    tmp = path.with_name(f".{path.name}.tmp")
+    new_wb.save(tmp)
+    os.replace(tmp, path)
+    return MigrationResult(path=path, status="migrée", conflicts=conflicts)
+
+
+def print_migration_report(mapping: RubricMapping, results: list[MigrationResult]):
+    for label in mapping.removed:
+        print(f"Indicateur retiré : {label}")
+    for label in mapping.added:
+        print(f"Indicateur ajouté : {label}")
+    for result in results:
+        print(f"{result.path.name} : {result.status}")
+        for conflict in result.conflicts:
+            print(f"    {conflict}")
+    counts: dict[str, int] = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    print(", ".join(f"{count} {status}" for status, count in counts.items()) or "Aucune grille.")
+
+
+def read_stamp(path: Path) -> str | None:
+    """
+    Lit la propriété de migration directement dans l'archive, sans charger le classeur.
+    """
+    with zipfile.ZipFile(path) as z:
+        if "docProps/custom.xml" not in z.namelist():
+            return None
+        root = fromstring(z.read("docProps/custom.xml"))
+    for prop in root:
+        if prop.get("name") == STAMP_PROPERTY and len(prop):
+            return prop[0].text
+    return None
+
+
+def _layout_signature(layout: RubricLayout) -> tuple:
+    return (layout.sheet, layout.level_labels, layout.grade_column,
+            [(c.row, c.label, [(i.row, i.label) for i in c.indicators])
+             for c in layout.criteria])
+
+
+def _copy_cell(source, ws: Worksheet, row: int, column: int):
+    target = ws.cell(row=row, column=column)
+    target.value = source.value
+    target.number_format = source.number_format
+
+
+def _sheet_values(ws: Worksheet) -> dict[tuple[int, int], object]:
+    return {(cell.row, cell.column): cell.value
+            for row in ws.iter_rows() for cell in row if cell.value is not None}
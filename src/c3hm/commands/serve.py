@@ -0,0 +1,250 @@
+import io
+import json
+import os
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+import openpyxl
+
+from c3hm.commands.feedback import fill_omnivox_sheet
+from c3hm.commands.grading import (
+    GradebookState,
+    find_rubric_layout,
+    gradebook_files,
+    read_many_gradebook_states,
+)
+from c3hm.data.rubric import RubricLayout
+
+DEFAULT_PORT = 8765
+
+_XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+class GradebookCache:
+    """
+    Cache en mémoire de la disposition de la grille et de l'état de chaque grille
+    d'un dossier.
+
+    `refresh` compare la date de modification et la taille de chaque fichier avec
+    celles de la dernière lecture: seules les grilles modifiées sont relues. Un
+    fichier illisible (par exemple pendant qu'Excel l'enregistre) garde son état
+    précédent et sera relu au prochain rafraîchissement.
+    """
+
+    def __init__(self, folder: Path, rubric: Path | None = None, workers: int | None = None):
+        self.folder = folder
+        self.rubric = rubric
+        self.workers = workers
+        self._lock = threading.Lock()
+        self._layout: RubricLayout | None = None
+        self._rubric_key: tuple[int, int] | None = None
+        self._entries: dict[Path, tuple[tuple[int, int], list[GradebookState]]] = {}
+        self.errors: dict[Path, str] = {}
+        self.refresh()
+
+    def refresh(self) -> int:
+        """
+        Relit les grilles modifiées depuis le dernier appel et oublie celles qui
+        ont été supprimées. Retourne le nombre de fichiers relus.
+        """
+        if self.rubric is not None:
+            rubric_key = _file_key(self.rubric)
+            if rubric_key != self._rubric_key:
+                # Le modèle a changé: tout est relu avec la nouvelle disposition
+                with self._lock:
+                    self._layout = None
+                    self._entries.clear()
+                self._rubric_key = rubric_key
+        if self._layout is None:
+            try:
+                self._layout = find_rubric_layout(self.folder, self.rubric)
+            except FileNotFoundError:
+                return 0
+
+        keys = {}
+        for path in gradebook_files(self.folder):
+            key = _file_key(path)
+            if key is not None:
+                keys[path] = key
+        changed = [path for path, key in keys.items()
+                   if path not in self._entries or self._entries[path][0] != key]
+
+        results = read_many_gradebook_states(changed, self._layout, self.workers)
+
+        with self._lock:
+            for path in set(self._entries) - set(keys):
+                del self._entries[path]
+                self.errors.pop(path, None)
+            for path, (states, error) in zip(changed, results, strict=True):
+                if error is None:
+                    self._entries[path] = (keys[path], states)
+                    self.errors.pop(path, None)
+                else:
+                    self.errors[path] = error
+        return len(changed)
+
+    def states(self) -> list[GradebookState]:
+        with self._lock:
+            return [state for path in sorted(self._entries)
+                    for state in self._entries[path][1]]
+
+    def error_snapshot(self) -> dict[Path, str]:
+        with self._lock:
+            return dict(self.errors)
+
+    def watch(self, interval: float, stop: threading.Event, verbose: bool = False):
+        """
+        Rafraîchit le cache toutes les `interval` secondes jusqu'à ce que `stop` soit levé.
+        """
+        while not stop.wait(interval):
+            try:
+                count = self.refresh()
+            except Exception as e:
+                print(f"Erreur lors du rafraîchissement : {e}")
+                continue
+            if verbose and count:
+                print(f"{count} grille(s) relue(s)")
+
+
+class GradingServer(ThreadingHTTPServer):
+    """
+    Serveur HTTP local qui répond aux requêtes à partir du cache des grilles.
+    """
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], cache: GradebookCache, verbose: bool = False):
+        super().__init__(address, _Handler)
+        self.cache = cache
+        self.verbose = verbose
+
+
+def serve(folder: Path, rubric: Path | None = None, host: str = "127.0.0.1",
+          port: int = DEFAULT_PORT, interval: float = 1.0, verbose: bool = False):
+    """
+    Démarre le serveur de correction et bloque jusqu'à Ctrl+C.
+    """
+    if not folder.exists():
+        raise FileNotFoundError(f"Le dossier {folder} n'existe pas.")
+
+    cache = GradebookCache(folder, rubric)
+    print(f"{len(cache.states())} grille(s) chargée(s) depuis {folder}")
+    stop = threading.Event()
+    watcher = threading.Thread(target=cache.watch, args=(interval, stop, verbose), daemon=True)
+    watcher.start()
+    with GradingServer((host, port), cache, verbose) as server:
+        url = f"http://{host}:{server.server_address[1]}/"
+        print(f"Serveur démarré sur {url} (Ctrl+C pour arrêter)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            stop.set()
+
+
+def totals_payload(states: list[GradebookState]) -> list[dict[str, Any]]:
+    return [
+        {
+            "matricule": s.matricule,
+            "nom": s.name,
+            "note": s.grade,
+            "fichier": s.path.name,
+            "feuille": s.sheet,
+        }
+        for s in states
+    ]
+
+
+def progress_payload(states: list[GradebookState]) -> dict[str, Any]:
+    students = [
+        {
+            "matricule": s.matricule,
+            "nom": s.name,
+            "complet": s.is_complete,
+            "sans_niveau": [f"{i.criterion} / {i.label}" for i in s.missing],
+            "plusieurs_niveaux": [f"{i.criterion} / {i.label}" for i in s.conflicts],
+            "commentaire": s.has_comment,
+        }
+        for s in states
+    ]
+    return {
+        "total": len(students),
+        "complets": sum(1 for s in students if s["complet"]),
+        "etudiants": students,
+    }
+
+
+def omnivox_rows(states: list[GradebookState]) -> list[dict[str, Any]]:
+    return [
+        {
+            "cthm_matricule": s.values.get("cthm_matricule"),
+            "cthm_note": s.grade,
+            "cthm_commentaire": s.values.get("cthm_commentaire"),
+            "cthm_nom": s.values.get("cthm_nom"),
+        }
+        for s in states
+    ]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: GradingServer
+
+    def do_GET(self):  # noqa: N802 (nom imposé par BaseHTTPRequestHandler)
+        route = urlparse(self.path).path.rstrip("/") or "/"
+        states = self.server.cache.states()
+        if route == "/":
+            self._send_json({
+                "dossier": str(self.server.cache.folder),
+                "grilles": len(states),
+                "erreurs": {p.name: e for p, e in self.server.cache.error_snapshot().items()},
+                "routes": ["/totals", "/progress", "/omnivox.json", "/omnivox.xlsx"],
+            })
+        elif route == "/totals":
+            self._send_json(totals_payload(states))
+        elif route == "/progress":
+            self._send_json(progress_payload(states))
+        elif route == "/omnivox.json":
+            self._send_json([
+                {"Code omnivox": r["cthm_matricule"], "Note": r["cthm_note"],
+                 "Commentaire": r["cthm_commentaire"], "Nom": r["cthm_nom"]}
+                for r in omnivox_rows(states)
+            ])
+        elif route == "/omnivox.xlsx":
+            wb = openpyxl.Workbook()
+            fill_omnivox_sheet(wb.active, omnivox_rows(states))  # type: ignore
+            buffer = io.BytesIO()
+            wb.save(buffer)
+            self._send(buffer.getvalue(), _XLSX_TYPE,
+                       {"Content-Disposition": 'attachment; filename="notes_omnivox.xlsx"'})
+        else:
+            self._send_json({"erreur": f"Route inconnue : {route}"}, HTTPStatus.NOT_FOUND)
+
+    def log_message(self, format: str, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, payload: Any, status: HTTPStatus = HTTPStatus.OK):
+        body = json.dumps(payload, ensure_ascii=False, indent=2).encode("utf-8")
+        self._send(body, "application/json; charset=utf-8", status=status)
+
+    def _send(self, body: bytes, content_type: str, headers: dict[str, str] | None = None,
+              status: HTTPStatus = HTTPStatus.OK):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _file_key(path: Path) -> tuple[int, int] | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
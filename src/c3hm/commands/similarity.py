@@ -0,0 +1,426 @@
+import hashlib
+import os
+import re
+import sqlite3
+from array import array
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from c3hm.data.submission_index import C3HM_PREFIX, is_pruned, is_student_folder
+
+CACHE_FILE_NAME = ".c3hm_similarite.sqlite"
+
+# Une empreinte possédée par plus d'étudiants que ce nombre (ou que 10 % du groupe,
+# si c'est plus) est considérée comme du code commun pour la recherche d'inclusion
+RARE_FINGERPRINT_MIN_OWNERS = 10
+
+SOURCE_EXTENSIONS = {
+    ".py", ".java", ".kt", ".cs", ".c", ".h", ".cpp", ".hpp", ".cc",
+    ".js", ".jsx", ".ts", ".tsx", ".mjs", ".vue", ".php", ".rb", ".go", ".rs",
+    ".swift", ".dart", ".html", ".htm", ".css", ".scss", ".sql", ".sh", ".ps1",
+}
+
+# Mots-clés conservés tels quels lors de la normalisation. Les autres
+# identifiants sont remplacés par un jeton générique pour que renommer les
+# variables ne suffise pas à cacher une copie.
+KEYWORDS = {
+    "if", "else", "elif", "for", "while", "do", "switch", "case", "break", "continue",
+    "return", "def", "class", "function", "const", "let", "var", "new", "try", "catch",
+    "except", "finally", "throw", "raise", "import", "from", "export", "public",
+    "private", "protected", "static", "void", "int", "float", "double", "bool",
+    "boolean", "char", "string", "struct", "interface", "extends", "implements",
+    "this", "self", "super", "null", "None", "true", "false", "True", "False",
+    "and", "or", "not", "in", "is", "lambda", "with", "yield", "async", "await",
+    "select", "insert", "update", "delete", "where", "join", "create", "table",
+}
+
+_TOKEN_RE = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*'|`(?:\\.|[^`\\])*`)"""  # chaînes
+    r"|(\d+(?:\.\d+)?)"                                             # nombres
+    r"|([A-Za-z_$][\w$]*)"                                          # identifiants
+    r"|(\S)"                                                        # ponctuation
+)
+
+_C_COMMENTS = re.compile(r"/\*.*?\*/|//[^\n]*", re.DOTALL)
+_HASH_COMMENTS = re.compile(r"#[^\n]*")
+_HTML_COMMENTS = re.compile(r"<!--.*?-->", re.DOTALL)
+_SQL_COMMENTS = re.compile(r"--[^\n]*")
+
+_COMMENTS_BY_EXTENSION = {
+    ".py": [_HASH_COMMENTS], ".rb": [_HASH_COMMENTS], ".sh": [_HASH_COMMENTS],
+    ".ps1": [_HASH_COMMENTS], ".html": [_HTML_COMMENTS], ".htm": [_HTML_COMMENTS],
+    ".vue": [_HTML_COMMENTS, _C_COMMENTS], ".php": [_C_COMMENTS, _HASH_COMMENTS],
+    ".sql": [_SQL_COMMENTS, _C_COMMENTS],
+}
+
+class SimilarityPair(BaseModel):
+    first: str
+    second: str
+    jaccard: float
+    containment: float
+    shared: int
+    first_file: str | None = None
+    second_file: str | None = None
+
+
+class SimilarityChecker(BaseModel):
+    verbose: bool = False
+    folders: list[Path]
+    paths_to_delete: list[str]
+    base_folder: Path | None = None
+    threshold: float = 0.5
+    kgram: int = 5
+    window: int = 4
+    num_perm: int = 128
+    workers: int | None = None
+
+    def find_similar(self) -> list[SimilarityPair]:
+        """
+        Trouve les paires d'étudiants dont le code est suspicieusement similaire.
+
+        Chaque fichier source est normalisé et réduit à une empreinte par
+        « winnowing ». Les empreintes de chaque étudiant sont résumées par une
+        signature MinHash, puis un index LSH propose les paires candidates: seules
+        ces paires sont comparées, ce qui évite de comparer tous les étudiants deux
+        à deux.
+
+        L'index LSH ne trouve que les paires de remises semblables dans leur ensemble.
+        Pour une copie partielle (une petite remise incluse dans une grande), un index
+        inversé des empreintes rares propose aussi les paires dont l'inclusion est élevée.
+        """
+        for folder in self.folders:
+            if not folder.exists():
+                raise FileNotFoundError(f"Le dossier {folder} n'existe pas.")
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            files = self._fingerprint_folders(pool)
+
+            # Le code fourni aux étudiants (énoncé, code de départ) n'est pas suspect
+            base: set[int] = set()
+            if self.base_folder is not None:
+                for hashes in self._fingerprint_tree(pool, self.base_folder).values():
+                    base.update(hashes)
+
+            students: dict[str, set[int]] = {}
+            for student, student_files in files.items():
+                hashes: set[int] = set()
+                for file_hashes in student_files.values():
+                    hashes.update(file_hashes)
+                hashes -= base
+                if hashes:
+                    students[student] = hashes
+
+            self._vprint(f"Calcul des signatures MinHash de {len(students)} étudiants")
+            names = list(students)
+            chunks = [sorted(students[name]) for name in names]
+            signatures = dict(zip(
+                names,
+                pool.map(_minhash, chunks, [self.num_perm] * len(chunks)),
+                strict=True
+            ))
+
+        candidates = self._candidate_pairs(signatures) | self._containment_pairs(students)
+        self._vprint(f"{len(candidates)} paires candidates")
+        pairs = []
+        for first, second in sorted(candidates):
+            a, b = students[first], students[second]
+            shared = len(a & b)
+            jaccard = shared / len(a | b)
+            containment = shared / min(len(a), len(b))
+            if max(jaccard, containment) < self.threshold:
+                continue
+            first_file, second_file = _best_file_pair(files[first], files[second], base)
+            pairs.append(SimilarityPair(
+                first=first, second=second, jaccard=jaccard, containment=containment,
+                shared=shared, first_file=first_file, second_file=second_file
+            ))
+        pairs.sort(key=lambda p: max(p.jaccard, p.containment), reverse=True)
+        return pairs
+
+    def _fingerprint_folders(self, pool: ProcessPoolExecutor) -> dict[str, dict[str, set[int]]]:
+        """
+        Retourne les empreintes de chaque fichier source, regroupées par étudiant.
+        Les étudiants sont préfixés par leur groupe lorsque plusieurs dossiers sont comparés.
+
+        Une remise d'un seul fichier source, laissée telle quelle par `unpack` à la
+        racine du dossier (ex: `Roy_Chloe_3333333.py`), compte comme un étudiant.
+        """
+        result: dict[str, dict[str, set[int]]] = {}
+        for folder in self.folders:
+            for student_path in sorted(folder.iterdir()):
+                if not (is_student_folder(student_path) or _is_loose_source(student_path)):
+                    continue
+                name = student_path.name
+                if len(self.folders) > 1:
+                    name = f"{folder.name}/{name}"
+                result[name] = {}
+            for rel_path, hashes in self._fingerprint_tree(pool, folder).items():
+                student, _, file_name = rel_path.partition("/")
+                name = f"{folder.name}/{student}" if len(self.folders) > 1 else student
+                if name in result:
+                    result[name][file_name or student] = hashes
+        return result
+
+    def _fingerprint_tree(self, pool: ProcessPoolExecutor, folder: Path) -> dict[str, set[int]]:
+        """
+        Calcule les empreintes des fichiers sources d'un dossier. Les empreintes sont
+        conservées dans un cache à la racine du dossier et recalculées seulement pour
+        les fichiers modifiés.
+        """
+        sources = list(_iter_sources(folder, self.paths_to_delete))
+        self._vprint(f"{len(sources)} fichiers sources dans {folder}")
+
+        result: dict[str, set[int]] = {}
+        conn = sqlite3.connect(folder / CACHE_FILE_NAME)
+        try:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS fingerprints (path TEXT PRIMARY KEY, "
+                "size INTEGER, mtime_ns INTEGER, params TEXT, hashes BLOB)"
+            )
+            params = f"{self.kgram}:{self.window}"
+            cached = {
+                row[0]: row[1:] for row in conn.execute(
+                    "SELECT path, size, mtime_ns, params, hashes FROM fingerprints"
+                )
+            }
+            todo = []
+            for rel_path, path, st in sources:
+                entry = cached.get(rel_path)
+                if entry and entry[:3] == (st.st_size, st.st_mtime_ns, params):
+                    result[rel_path] = set(array("Q", entry[3]))
+                else:
+                    todo.append((rel_path, path, st))
+
+            self._vprint(f"{len(todo)} fichiers à analyser, "
+                         f"{len(sources) - len(todo)} trouvés dans le cache")
+            fingerprints = pool.map(
+                _fingerprint_file,
+                [path for _, path, _ in todo],
+                [self.kgram] * len(todo),
+                [self.window] * len(todo),
+                chunksize=16
+            )
+            rows = []
+            for (rel_path, _, st), hashes in zip(todo, fingerprints, strict=True):
+                result[rel_path] = set(hashes)
+                rows.append((rel_path, st.st_size, st.st_mtime_ns, params,
+                             array("Q", hashes).tobytes()))
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO fingerprints VALUES (?, ?, ?, ?, ?)",
+                                 rows)
+                # Oublie les fichiers qui n'existent plus
+                stale = set(cached) - {rel_path for rel_path, _, _ in sources}
+                conn.executemany("DELETE FROM fingerprints WHERE path = ?",
+                                 [(p,) for p in stale])
+        finally:
+            conn.close()
+        return result
+
+    def _candidate_pairs(self, signatures: dict[str, list[int]]) -> set[tuple[str, str]]:
+        """
+        Découpe les signatures en bandes. Deux étudiants qui partagent au moins
+        une bande identique forment une paire candidate.
+        """
+        bands, rows = _lsh_parameters(self.num_perm, self.threshold)
+        buckets: dict[tuple, list[str]] = defaultdict(list)
+        for name, signature in signatures.items():
+            for band in range(bands):
+                key = (band, *signature[band * rows:(band + 1) * rows])
+                buckets[key].append(name)
+
+        candidates = set()
+        for names in buckets.values():
+            if len(names) > 1:
+                candidates.update(combinations(sorted(names), 2))
+        return candidates
+
+    def _containment_pairs(self, students: dict[str, set[int]]) -> set[tuple[str, str]]:
+        """
+        Propose les paires dont une remise est en bonne partie incluse dans l'autre.
+
+        Un index inversé associe chaque empreinte aux étudiants qui la possèdent. Les
+        empreintes partagées par beaucoup d'étudiants (code commun à tout le groupe)
+        sont ignorées, ce qui borne le nombre de paires à compter. Une paire est
+        candidate si les empreintes rares communes couvrent au moins la moitié du
+        seuil de la plus petite remise; la similarité exacte est calculée ensuite.
+        """
+        max_owners = max(RARE_FINGERPRINT_MIN_OWNERS, len(students) // 10)
+        owners: dict[int, list[str]] = defaultdict(list)
+        for name, hashes in students.items():
+            for h in hashes:
+                owners[h].append(name)
+
+        shared: dict[tuple[str, str], int] = defaultdict(int)
+        for names in owners.values():
+            if 1 < len(names) <= max_owners:
+                for pair in combinations(sorted(names), 2):
+                    shared[pair] += 1
+
+        return {
+            (first, second) for (first, second), count in shared.items()
+            if count >= 0.5 * self.threshold
+            * min(len(students[first]), len(students[second]))
+        }
+
+    def _vprint(self, *args):
+        if self.verbose:
+            print(*args)
+
+
+def print_similarity_report(pairs: list[SimilarityPair]):
+    if not pairs:
+        print("Aucune paire suspecte.")
+        return
+    for pair in pairs:
+        print(f"{max(pair.jaccard, pair.containment):6.1%}  {pair.first}  ↔  {pair.second}  "
+              f"(jaccard {pair.jaccard:.1%}, inclusion {pair.containment:.1%}, "
+              f"{pair.shared} empreintes communes)")
+        if pair.first_file and pair.second_file:
+            print(f"        {pair.first_file}  ↔  {pair.second_file}")
+
+
+def tokenize(text: str, extension: str = "") -> list[str]:
+    """
+    Découpe le code en jetons normalisés: les commentaires sont retirés, les
+    identifiants, chaînes et nombres sont remplacés par un jeton générique.
+    """
+    for pattern in _COMMENTS_BY_EXTENSION.get(extension, [_C_COMMENTS]):
+        text = pattern.sub(" ", text)
+    tokens = []
+    for string, number, identifier, other in _TOKEN_RE.findall(text):
+        if string:
+            tokens.append("S")
+        elif number:
+            tokens.append("N")
+        elif identifier:
+            tokens.append(identifier if identifier in KEYWORDS else "I")
+        else:
+            tokens.append(other)
+    return tokens
+
+
+def winnow(tokens: list[str], kgram: int, window: int) -> list[int]:
+    """
+    Algorithme de « winnowing » (Schleimer et al., 2003): conserve le plus petit
+    hachage de chaque fenêtre de k-grammes consécutifs.
+    """
+    hashes = [
+        int.from_bytes(
+            hashlib.blake2b("\x1f".join(tokens[i:i + kgram]).encode(), digest_size=8).digest(),
+            "little"
+        )
+        for i in range(len(tokens) - kgram + 1)
+    ]
+    if len(hashes) <= window:
+        return sorted(set(hashes))
+    selected = set()
+    for i in range(len(hashes) - window + 1):
+        selected.add(min(hashes[i:i + window]))
+    return sorted(selected)
+
+
+def _fingerprint_file(path: str, kgram: int, window: int) -> list[int]:
+    try:
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            text = f.read()
+    except OSError:
+        return []
+    return winnow(tokenize(text, os.path.splitext(path)[1].lower()), kgram, window)
+
+
+def _minhash(hashes: list[int], num_perm: int) -> list[int]:
+    """
+    Signature MinHash à une seule permutation: les empreintes sont déjà des
+    hachages uniformes, on les répartit dans `num_perm` cases et on garde le
+    minimum de chaque case. Les cases vides sont remplies par « densification »
+    (Shrivastava, 2017) à partir de la prochaine case non vide.
+    """
+    signature: list[int | None] = [None] * num_perm
+    for h in hashes:
+        slot = h % num_perm
+        value = h // num_perm
+        current = signature[slot]
+        if current is None or value < current:
+            signature[slot] = value
+
+    filled = [i for i, value in enumerate(signature) if value is not None]
+    if not filled:
+        return [0] * num_perm
+    result = []
+    for i, value in enumerate(signature):
+        if value is None:
+            # Prochaine case non vide, en revenant au début au besoin
+            j = next((k for k in filled if k > i), filled[0])
+            distance = (j - i) % num_perm
+            value = signature[j] + (distance << 64)  # type: ignore
+        result.append(value)
+    return result
+
+
+def _lsh_parameters(num_perm: int, threshold: float) -> tuple[int, int]:
+    """
+    Choisit le nombre de bandes et de rangées par bande. On vise un seuil LSH
+    un peu plus bas que le seuil demandé pour limiter les faux négatifs.
+    """
+    target = threshold * 0.8
+    best = (num_perm, 1)
+    best_error = float("inf")
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        error = abs((1 / bands) ** (1 / rows) - target)
+        if error < best_error:
+            best, best_error = (bands, rows), error
+    return best
+
+
+def _best_file_pair(first: dict[str, set[int]], second: dict[str, set[int]],
+                    base: set[int]) -> tuple[str | None, str | None]:
+    """
+    Trouve la paire de fichiers qui partage le plus d'empreintes.
+    """
+    owners: dict[int, list[str]] = defaultdict(list)
+    for name, hashes in second.items():
+        for h in hashes - base:
+            owners[h].append(name)
+    best, best_count = (None, None), 0
+    for name, hashes in first.items():
+        counts: dict[str, int] = defaultdict(int)
+        for h in hashes - base:
+            for other in owners.get(h, ()):
+                counts[other] += 1
+        for other, count in counts.items():
+            if count > best_count:
+                best, best_count = (name, other), count
+    return best
+
+
+def _is_loose_source(path: Path) -> bool:
+    return (path.is_file() and not path.name.startswith(C3HM_PREFIX)
+            and path.suffix.lower() in SOURCE_EXTENSIONS)
+
+
+def _iter_sources(folder: Path, paths_to_delete: list[str]):
+    """
+    Retourne (chemin relatif, chemin, stat) pour chaque fichier source du dossier.
+    """
+    stack = [folder]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            if is_pruned(entry.name, paths_to_delete) or entry.name.startswith(C3HM_PREFIX):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(Path(entry.path))
+            elif os.path.splitext(entry.name)[1].lower() in SOURCE_EXTENSIONS:
+                rel_path = Path(entry.path).relative_to(folder).as_posix()
+                yield rel_path, entry.path, entry.stat()
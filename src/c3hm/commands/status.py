@@ -0,0 +1,63 @@
+from pathlib import Path
+
+from pydantic import BaseModel
+
+from c3hm.commands.grading import (
+    GradebookState,
+    find_rubric_layout,
+    gradebook_files,
+    read_many_gradebook_states,
+)
+
+
+class StatusReport(BaseModel):
+    states: list[GradebookState]
+    errors: dict[Path, str] = {}
+
+
+def gradebook_status(folder: Path, rubric: Path | None = None,
+                     workers: int | None = None) -> StatusReport:
+    """
+    Lit l'avancement de la correction de chaque grille du dossier: indicateurs sans
+    niveau, indicateurs avec plusieurs niveaux (#N/A dans Excel) et commentaire général.
+
+    Seules les cellules nommées et la plage des indicateurs de chaque feuille sont
+    lues, directement dans le XML, sans charger les classeurs avec openpyxl.
+    """
+    if not folder.exists():
+        raise FileNotFoundError(f"Le dossier {folder} n'existe pas.")
+
+    layout = find_rubric_layout(folder, rubric)
+    paths = gradebook_files(folder)
+    report = StatusReport(states=[])
+    for path, (states, error) in zip(paths, read_many_gradebook_states(paths, layout, workers),
+                                     strict=True):
+        if error is not None:
+            report.errors[path] = error
+        report.states.extend(states)
+    return report
+
+
+def print_status(report: StatusReport, incomplete_only: bool = False, verbose: bool = False):
+    """
+    Affiche un tableau de l'avancement de la correction, un étudiant par ligne.
+    """
+    states = [s for s in report.states if not (incomplete_only and s.is_complete)]
+    width = max([len(s.name) for s in states] + [len("Étudiant")])
+    print(f"{'Étudiant':<{width}}  {'Matricule':<9}  {'Indicateurs':>11}  {'Sans niveau':>11}  "
+          f"{'Plusieurs':>9}  {'Commentaire':>11}  Statut")
+    for s in states:
+        done = len(s.indicators) - len(s.missing) - len(s.conflicts)
+        status = "complète" if s.is_complete else "à compléter"
+        print(f"{s.name:<{width}}  {s.matricule:<9}  {f'{done}/{len(s.indicators)}':>11}  "
+              f"{len(s.missing):>11}  {len(s.conflicts):>9}  "
+              f"{'oui' if s.has_comment else 'non':>11}  {status}")
+        if verbose:
+            for i in s.missing:
+                print(f"    Sans niveau : {i.criterion} / {i.label}")
+            for i in s.conflicts:
+                print(f"    Plusieurs niveaux : {i.criterion} / {i.label}")
+    for path, error in report.errors.items():
+        print(f"Erreur avec {path.name} : {error}")
+    complete = sum(1 for s in report.states if s.is_complete)
+    print(f"{complete}/{len(report.states)} grilles complètes")
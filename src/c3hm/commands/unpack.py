@@ -1,11 +1,15 @@
 import os
 import shutil
 import subprocess
+import tempfile
 import zipfile
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 
 from pydantic import BaseModel
 
+from c3hm.commands.lazy import LazyIndex
+from c3hm.data.submission_index import C3HM_PREFIX, is_pruned
+
 PATHS_TO_DELETE = [
     "__pycache__",
     ".DS_Store",
@@ -18,10 +22,15 @@ PATHS_TO_DELETE = [
     "__MACOSX",
 ]
 
+# Taille au-delà de laquelle une archive imbriquée est copiée sur disque plutôt qu'en mémoire
+SPOOL_MAX_SIZE = 64 * 1024 * 1024
+
 class UnpackOmnivox(BaseModel):
     verbose: bool = False
     folder: Path
     paths_to_delete: list[str]
+    streaming: bool = False
+    lazy: bool = False
 
     def unpack(self):
         """
@@ -33,8 +42,16 @@ class UnpackOmnivox(BaseModel):
 
         self._vprint(f"Début de l'extraction de {self.folder}")
 
-        # Si le dossier est lui-même une archive, on le décompresse d'abord
-        self._extract_self()
+        if self.lazy:
+            self._unpack_lazy()
+            return
+
+        if self.streaming and self._is_self_zip():
+            # Les archives des étudiants sont lues directement dans l'archive Omnivox
+            self._extract_self_streaming()
+        else:
+            # Si le dossier est lui-même une archive, on le décompresse d'abord
+            self._extract_self()
 
         # Parcourt le dossier pour trouver les archives des étudiants
         self._extract_student_archives()
@@ -42,14 +59,35 @@ class UnpackOmnivox(BaseModel):
         # Nettoyage des fichiers et dossiers indésirables
         self._clean_student_archives()
 
-    def _clean_student_archives(self):
+    def _unpack_lazy(self):
+        """
+        Décompresse seulement l'archive Omnivox et indexe les archives .zip des
+        étudiants sans les extraire. Les fichiers sont ensuite extraits à la demande
+        avec `c3hm open`. Les archives .rar et .7z sont extraites normalement.
+        """
+        self._extract_self()
+        self._extract_student_archives(suffixes=[".rar", ".7z"])
+        self._clean_student_archives(skip_suffixes=[".zip"])
+
+        with LazyIndex(self.folder) as index:
+            for archive in sorted(self.folder.glob("*.zip")):
+                student = self._shorten_omnivox_archive_name(archive.stem)
+                try:
+                    count = index.add_archive(student, archive, self.paths_to_delete)
+                    self._vprint(f"Indexer : {archive} ({count} fichiers)")
+                except Exception as e:
+                    self._vprint(f"Erreur avec {archive} : {e}")
+
+    def _clean_student_archives(self, skip_suffixes: list[str] | None = None):
         """
         Supprime les fichiers et dossiers indésirables dans le dossier spécifié.
         """
         for archive in self.folder.glob("*"):
+            if archive.name.startswith(C3HM_PREFIX):
+                continue
             if archive.is_dir():
                 self._clean_student_archive(archive)
-            elif archive.is_file():
+            elif archive.is_file() and archive.suffix not in (skip_suffixes or []):
                 new_name = archive.parent / self._shorten_omnivox_file_name(archive)
                 i = 2
                 while new_name.exists():
@@ -84,9 +122,10 @@ class UnpackOmnivox(BaseModel):
         # Aplatit les dossiers uniques
         self._flatten_single_folders(path)
 
-    def _extract_student_archives(self):
+    def _extract_student_archives(self, suffixes: list[str] | None = None):
+        suffixes = suffixes or [".zip", ".rar", ".7z"]
         for archive in self.folder.glob("*"):
-            if archive.is_file() and archive.suffix in [".zip", ".rar", ".7z"]:
+            if archive.is_file() and archive.suffix in suffixes:
                 stem = self._shorten_omnivox_archive_name(archive.stem)
                 output_path = archive.parent / stem
                 self._extract_archive(archive, output_path)
@@ -96,11 +135,73 @@ class UnpackOmnivox(BaseModel):
         Décompresse l'archive dans le dossier spécifié et supprime les
         fichiers et dossiers indésirables.
         """
-        if self.folder.is_file() and self.folder.suffix in [".zip"]:
+        if self._is_self_zip():
             output_path = self.folder.parent / self.folder.stem
             self._extract_archive(self.folder, output_path)
             self.folder = output_path
 
+    def _is_self_zip(self) -> bool:
+        return self.folder.is_file() and self.folder.suffix in [".zip"]
+
+    def _extract_self_streaming(self):
+        """
+        Décompresse l'archive Omnivox en ouvrant les archives .zip des étudiants
+        directement depuis l'archive principale. Les archives intermédiaires ne sont
+        jamais écrites sur disque et les fichiers indésirables ne sont pas extraits.
+        """
+        output_path = self.folder.parent / self.folder.stem
+        complete = True
+        try:
+            with zipfile.ZipFile(self.folder) as outer:
+                for info in outer.infolist():
+                    if info.is_dir() or self._is_pruned_member(info.filename):
+                        continue
+                    member = PurePosixPath(info.filename)
+                    # Une remise illisible n'empêche pas d'extraire les suivantes
+                    try:
+                        if member.suffix != ".zip":
+                            # Les .rar, .7z et autres fichiers sont traités comme d'habitude
+                            outer.extract(info, output_path)
+                            continue
+                        target = (output_path / member.parent
+                                  / self._shorten_omnivox_archive_name(member.stem))
+                        self._extract_nested_zip(outer, info, target)
+                    except Exception as e:
+                        self._vprint(f"Erreur avec {info.filename} : {e}")
+                        complete = False
+        except Exception as e:
+            self._vprint(f"Erreur avec {self.folder} : {e}")
+            return
+        self._vprint(f"Dézipper : {self.folder}")
+        # L'archive Omnivox est gardée si une remise n'a pas pu en être sortie
+        if complete:
+            self.folder.unlink()
+        self.folder = output_path
+
+    def _extract_nested_zip(self, outer: zipfile.ZipFile, info: zipfile.ZipInfo, output: Path):
+        """
+        Extrait une archive contenue dans une autre archive. L'archive est gardée en
+        mémoire, ou dans un fichier temporaire si elle est trop grosse.
+        """
+        with (tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE) as spool,
+              outer.open(info) as member):
+            shutil.copyfileobj(member, spool, 1024 * 1024)
+            spool.seek(0)
+            try:
+                with zipfile.ZipFile(spool) as inner:
+                    for inner_info in inner.infolist():
+                        if not self._is_pruned_member(inner_info.filename):
+                            inner.extract(inner_info, output)
+                self._vprint(f"Dézipper : {info.filename}")
+            except Exception as e:
+                # Archive corrompue ou méthode de compression non supportée (deflate64):
+                # on garde l'archive telle quelle pour que l'erreur soit visible
+                self._vprint(f"Erreur avec {info.filename} : {e}")
+                outer.extract(info, output.parent)
+
+    def _is_pruned_member(self, name: str) -> bool:
+        return any(is_pruned(part, self.paths_to_delete) for part in PurePosixPath(name).parts)
+
     def _vprint(self, *args):
         if self.verbose:
             print(*args)
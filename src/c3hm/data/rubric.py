@@ -0,0 +1,207 @@
+import re
+from collections.abc import Callable, Mapping
+from pathlib import Path
+from typing import Any
+
+from openpyxl.utils import get_column_letter
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string
+from openpyxl.workbook.workbook import Workbook
+from pydantic import BaseModel
+
+from c3hm.data.xlsx import XlsxReader, split_reference
+
+CTHM_NAMES = ["cthm_matricule", "cthm_nom", "cthm_note", "cthm_commentaire"]
+
+# Premières lignes possibles de la grille (les lignes au-dessus sont l'en-tête)
+FIRST_GRID_ROW = 6
+
+FIRST_LEVEL_COLUMN = 4  # Colonne D
+
+# Pourcentage accordé par chaque niveau lorsqu'il est coché, ex: IF(ISTEXT(D10),C10*0.8,...
+_LEVEL_FACTOR_RE = re.compile(r"IF\(ISTEXT\([A-Z]+\d+\),C\d+\*([0-9.]+)")
+
+
+class IndicatorLayout(BaseModel):
+    row: int
+    label: str
+    points: float | None = None
+
+
+class CriterionLayout(BaseModel):
+    row: int
+    label: str
+    indicators: list[IndicatorLayout] = []
+
+
+class RubricLayout(BaseModel):
+    """
+    Disposition d'une grille générée par `export_template`: position des critères,
+    des indicateurs, des colonnes de niveaux et des plages nommées.
+    """
+    sheet: str
+    level_labels: list[str]
+    grade_column: int
+    comment_column: int
+    criteria: list[CriterionLayout]
+    level_factors: list[float] = []
+    bonus_row: int | None = None
+    named_cells: dict[str, str] = {}
+
+    @property
+    def nb_levels(self) -> int:
+        return len(self.level_labels)
+
+    @property
+    def level_columns(self) -> list[int]:
+        return list(range(FIRST_LEVEL_COLUMN, FIRST_LEVEL_COLUMN + self.nb_levels))
+
+    @property
+    def indicators(self) -> list[tuple[CriterionLayout, IndicatorLayout]]:
+        return [(c, i) for c in self.criteria for i in c.indicators]
+
+    def indicator_range(self) -> str:
+        """
+        Plage couvrant les cellules de niveaux et de commentaires de tous les indicateurs.
+        """
+        rows = [i.row for _, i in self.indicators]
+        return (f"{get_column_letter(FIRST_LEVEL_COLUMN)}{min(rows)}:"
+                f"{get_column_letter(self.comment_column)}{max(rows)}")
+
+    def grading_range(self) -> str:
+        """
+        Comme `indicator_range`, en incluant la ligne Bonus / Malus.
+        """
+        rows = [i.row for _, i in self.indicators]
+        if self.bonus_row is not None:
+            rows.append(self.bonus_row)
+        return (f"{get_column_letter(FIRST_LEVEL_COLUMN)}{min(rows)}:"
+                f"{get_column_letter(self.comment_column)}{max(rows)}")
+
+
+def load_rubric_layout(path: Path) -> RubricLayout:
+    """
+    Comme `read_rubric_layout`, à partir d'un fichier. Seule la feuille de la
+    grille est lue, sans charger le classeur avec openpyxl: un classeur unique
+    de plusieurs centaines de feuilles se lit aussi vite qu'une seule grille.
+    """
+    with XlsxReader(path) as reader:
+        if "cthm_matricule" in reader.defined_names:
+            defined_names = reader.defined_names
+        else:
+            sheets = [title for title in reader.sheets
+                      if "cthm_matricule" in reader.sheet_defined_names.get(title, {})]
+            if not sheets:
+                raise ValueError("La grille ne contient pas de plage nommée 'cthm_matricule'.")
+            defined_names = reader.sheet_defined_names[sheets[0]]
+        ref = split_reference(defined_names["cthm_matricule"])
+        if ref is None or ref[0] not in reader.sheets:
+            raise ValueError("La plage nommée 'cthm_matricule' ne désigne pas une cellule.")
+        title = ref[0]
+        values = reader.read_formulas(title)
+
+    cells: dict[tuple[int, int], Any] = {}
+    for coordinate, value in values.items():
+        column, row = coordinate_from_string(coordinate)
+        cells[(row, column_index_from_string(column))] = value
+    max_row = max((row for row, _ in cells), default=0)
+    max_column = max((column for _, column in cells), default=0)
+    return _build_layout(title, defined_names, lambda row, column: cells.get((row, column)),
+                         max_row, max_column)
+
+
+def read_rubric_layout(wb: Workbook) -> RubricLayout:
+    """
+    Retrouve la disposition d'une grille à partir de ses formules: chaque indicateur
+    a une formule `=IF(COUNTA(...` dans la colonne de note, et chaque critère une
+    formule `="Note : "...`. Les libellés peuvent donc avoir été modifiés.
+
+    Dans un classeur unique (une feuille par étudiant), la première feuille qui
+    a ses propres plages nommées est utilisée.
+    """
+    if "cthm_matricule" in wb.defined_names:
+        defined_names = wb.defined_names
+        title, _ = next(defined_names["cthm_matricule"].destinations)
+    else:
+        sheets = [ws for ws in wb.worksheets if "cthm_matricule" in ws.defined_names]
+        if not sheets:
+            raise ValueError("La grille ne contient pas de plage nommée 'cthm_matricule'.")
+        defined_names = sheets[0].defined_names
+        title = sheets[0].title
+    ws = wb[title]
+    return _build_layout(
+        title, {name: defined_names[name].attr_text for name in CTHM_NAMES
+                if name in defined_names},
+        lambda row, column: ws.cell(row=row, column=column).value, ws.max_row, ws.max_column
+    )
+
+
+def _build_layout(title: str, defined_names: Mapping[str, str],
+                  cell: Callable[[int, int], Any], max_row: int,
+                  max_column: int) -> RubricLayout:
+    """
+    Construit la disposition à partir des références des plages nommées et d'une
+    fonction qui donne le contenu (ou la formule) d'une cellule de la feuille.
+    """
+    named_cells = {}
+    for name in CTHM_NAMES:
+        if name in defined_names:
+            ref = split_reference(defined_names[name])
+            if ref is not None and ref[0] == title:
+                named_cells[name] = ref[1]
+
+    grade_column = None
+    for row_idx in range(FIRST_GRID_ROW, max_row + 1):
+        for column in range(1, max_column + 1):
+            if _is_indicator_formula(cell(row_idx, column)):
+                grade_column = column
+                break
+        if grade_column is not None:
+            break
+    if grade_column is None:
+        raise ValueError(f"Aucun indicateur trouvé dans la feuille '{title}'.")
+
+    criteria: list[CriterionLayout] = []
+    level_labels: list[str] = []
+    level_factors: list[float] = []
+    last_indicator_row = None
+    bonus_row = None
+    for row_idx in range(FIRST_GRID_ROW, max_row + 1):
+        grade = cell(row_idx, grade_column)
+        label = cell(row_idx, 2)
+        if isinstance(grade, str) and grade.startswith('=_xlfn.CONCAT("Note'):
+            criteria.append(CriterionLayout(row=row_idx, label=_text(label)))
+            if not level_labels:
+                level_labels = [_text(cell(row_idx, col))
+                                for col in range(FIRST_LEVEL_COLUMN, grade_column)]
+        elif _is_indicator_formula(grade) and criteria:
+            if not level_factors:
+                level_factors = [float(f) for f in _LEVEL_FACTOR_RE.findall(grade)]
+            points = cell(row_idx, 3)
+            criteria[-1].indicators.append(IndicatorLayout(
+                row=row_idx, label=_text(label),
+                points=points if isinstance(points, int | float) else None
+            ))
+            last_indicator_row = row_idx
+        elif last_indicator_row is not None and label not in (None, ""):
+            # Première ligne identifiée après la grille: Bonus / Malus
+            bonus_row = row_idx
+            break
+
+    return RubricLayout(
+        sheet=title,
+        level_labels=level_labels,
+        grade_column=grade_column,
+        comment_column=grade_column + 1,
+        criteria=criteria,
+        level_factors=level_factors,
+        bonus_row=bonus_row,
+        named_cells=named_cells,
+    )
+
+
+def _is_indicator_formula(value) -> bool:
+    return isinstance(value, str) and value.startswith("=IF(COUNTA(")
+
+
+def _text(value) -> str:
+    return "" if value is None else str(value).strip()
@@ -0,0 +1,247 @@
+import hashlib
+import os
+import sqlite3
+import time
+from fnmatch import fnmatch
+from pathlib import Path
+
+from pydantic import BaseModel, Field
+
+# Préfixe des fichiers et dossiers de travail que c3hm crée dans le dossier de correction
+C3HM_PREFIX = ".c3hm"
+
+INDEX_FILE_NAME = ".c3hm_index.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS folders (
+    name TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    file_count INTEGER NOT NULL,
+    pruned_hits INTEGER NOT NULL,
+    pruned_size INTEGER NOT NULL,
+    signature TEXT NOT NULL,
+    scanned_at REAL NOT NULL,
+    cleaned_signature TEXT
+);
+CREATE TABLE IF NOT EXISTS extensions (
+    folder TEXT NOT NULL REFERENCES folders(name) ON DELETE CASCADE,
+    extension TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    PRIMARY KEY (folder, extension)
+);
+"""
+
+
+class FolderStats(BaseModel):
+    """
+    Statistiques d'un dossier étudiant.
+    """
+    name: str
+    size: int = 0
+    mtime: float = 0.0
+    file_count: int = 0
+    pruned_hits: int = 0
+    pruned_size: int = 0
+    signature: str = ""
+    extensions: dict[str, tuple[int, int]] = Field(default_factory=dict)
+
+
+def is_student_folder(path: Path) -> bool:
+    """
+    Indique si un dossier est un dossier étudiant, et non un des dossiers de
+    travail de c3hm (corbeille, cache, etc.).
+    """
+    return path.is_dir() and not path.name.startswith(C3HM_PREFIX)
+
+
+def is_pruned(name: str, patterns: list[str]) -> bool:
+    """
+    Indique si un nom de fichier ou de dossier correspond à un des motifs à supprimer.
+    """
+    return any(fnmatch(name, pat) for pat in patterns)
+
+
+def folder_signature(path: Path, patterns: list[str], pruned: list[Path] | None = None) -> str:
+    """
+    Calcule une signature du dossier à partir de la date de modification de chacun
+    de ses sous-dossiers et de la taille et de la date de modification de chacun
+    de ses fichiers.
+
+    Ajouter, supprimer ou renommer un fichier modifie la date de son dossier parent,
+    mais modifier un fichier existant ne change que la date du fichier: les deux
+    sont donc pris en compte. Le contenu des dossiers à supprimer n'est pas parcouru.
+    Les informations proviennent de os.scandir (gratuites sous Windows), aucun
+    fichier n'est lu. Si `pruned` est donné, les fichiers et dossiers à supprimer
+    rencontrés y sont ajoutés.
+    """
+    h = _signature_hash(patterns)
+    stack = [path]
+    while stack:
+        current = stack.pop()
+        try:
+            st = current.stat()
+            entries = sorted(os.scandir(current), key=lambda e: e.name)
+        except OSError:
+            continue
+        _hash_folder(h, current.relative_to(path), st)
+        for entry in entries:
+            if is_pruned(entry.name, patterns):
+                _hash_pruned(h, entry)
+                if pruned is not None:
+                    pruned.append(Path(entry.path))
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                    continue
+                entry_st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            _hash_file(h, entry, entry_st)
+    return h.hexdigest()
+
+
+def scan_folder(path: Path, patterns: list[str]) -> FolderStats:
+    """
+    Parcourt un dossier étudiant avec os.scandir et calcule ses statistiques.
+    La signature (voir `folder_signature`) est calculée pendant le même parcours.
+    """
+    stats = FolderStats(name=path.name)
+    h = _signature_hash(patterns)
+    # (dossier, est dans une zone à supprimer). Les dossiers sont visités dans le
+    # même ordre que dans `folder_signature`, pour obtenir la même signature.
+    stack: list[tuple[Path, bool]] = [(path, False)]
+    while stack:
+        current, in_pruned = stack.pop()
+        try:
+            if not in_pruned:
+                st = current.stat()
+            entries = sorted(os.scandir(current), key=lambda e: e.name)
+        except OSError:
+            continue
+        if not in_pruned:
+            _hash_folder(h, current.relative_to(path), st)
+        for entry in entries:
+            pruned = in_pruned
+            if not in_pruned and is_pruned(entry.name, patterns):
+                stats.pruned_hits += 1
+                _hash_pruned(h, entry)
+                pruned = True
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append((Path(entry.path), pruned))
+                    continue
+                entry_st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if not pruned:
+                _hash_file(h, entry, entry_st)
+            stats.size += entry_st.st_size
+            stats.file_count += 1
+            stats.mtime = max(stats.mtime, entry_st.st_mtime)
+            if pruned:
+                stats.pruned_size += entry_st.st_size
+            ext = os.path.splitext(entry.name)[1].lower()
+            count, size = stats.extensions.get(ext, (0, 0))
+            stats.extensions[ext] = (count + 1, size + entry_st.st_size)
+    stats.signature = h.hexdigest()
+    return stats
+
+
+def _signature_hash(patterns: list[str]):
+    h = hashlib.sha1()
+    h.update("\0".join(patterns).encode())
+    return h
+
+
+def _hash_folder(h, relative: Path, st: os.stat_result):
+    h.update(f"{relative}\0{st.st_mtime_ns}\0".encode())
+
+
+def _hash_pruned(h, entry: os.DirEntry):
+    h.update(f"!{entry.name}\0".encode())
+
+
+def _hash_file(h, entry: os.DirEntry, st: os.stat_result):
+    h.update(f"{entry.name}\0{st.st_size}\0{st.st_mtime_ns}\0".encode())
+
+
+class SubmissionIndex:
+    """
+    Index persistant des dossiers étudiants, conservé dans un fichier SQLite
+    à la racine du dossier de correction.
+    """
+
+    def __init__(self, folder: Path):
+        self.path = folder / INDEX_FILE_NAME
+        self._conn = sqlite3.connect(self.path)
+        self._conn.execute("PRAGMA foreign_keys = ON")
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> "SubmissionIndex":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._conn.commit()
+        self._conn.close()
+
+    def get(self, name: str) -> FolderStats | None:
+        row = self._conn.execute(
+            "SELECT name, size, mtime, file_count, pruned_hits, pruned_size, signature "
+            "FROM folders WHERE name = ?", (name,)
+        ).fetchone()
+        if row is None:
+            return None
+        extensions = {
+            ext: (count, size) for ext, count, size in self._conn.execute(
+                "SELECT extension, count, size FROM extensions WHERE folder = ?", (name,)
+            )
+        }
+        return FolderStats(
+            name=row[0], size=row[1], mtime=row[2], file_count=row[3],
+            pruned_hits=row[4], pruned_size=row[5], signature=row[6],
+            extensions=extensions
+        )
+
+    def update(self, stats: FolderStats, cleaned: bool = False):
+        """
+        Enregistre les statistiques d'un dossier. Si `cleaned` est vrai, le dossier
+        est aussi marqué comme nettoyé dans son état actuel.
+        """
+        with self._conn:
+            self._conn.execute(
+                "INSERT INTO folders (name, size, mtime, file_count, pruned_hits, pruned_size, "
+                "signature, scanned_at, cleaned_signature) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET size = excluded.size, mtime = excluded.mtime, "
+                "file_count = excluded.file_count, pruned_hits = excluded.pruned_hits, "
+                "pruned_size = excluded.pruned_size, signature = excluded.signature, "
+                "scanned_at = excluded.scanned_at, "
+                "cleaned_signature = COALESCE(excluded.cleaned_signature, cleaned_signature)",
+                (stats.name, stats.size, stats.mtime, stats.file_count, stats.pruned_hits,
+                 stats.pruned_size, stats.signature, time.time(),
+                 stats.signature if cleaned else None)
+            )
+            self._conn.execute("DELETE FROM extensions WHERE folder = ?", (stats.name,))
+            self._conn.executemany(
+                "INSERT INTO extensions (folder, extension, count, size) VALUES (?, ?, ?, ?)",
+                [(stats.name, ext, count, size)
+                 for ext, (count, size) in stats.extensions.items()]
+            )
+
+    def cleaned_signature(self, name: str) -> str | None:
+        row = self._conn.execute(
+            "SELECT cleaned_signature FROM folders WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def names(self) -> list[str]:
+        return [row[0] for row in self._conn.execute("SELECT name FROM folders ORDER BY name")]
+
+    def remove(self, name: str):
+        with self._conn:
+            self._conn.execute("DELETE FROM folders WHERE name = ?", (name,))
@@ -0,0 +1,260 @@
+import posixpath
+import re
+import zipfile
+from collections.abc import Set
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+from xml.etree.ElementTree import fromstring, iterparse
+
+from openpyxl.formula.translate import Translator
+from openpyxl.styles.numbers import BUILTIN_FORMATS
+from openpyxl.utils.cell import coordinate_from_string, rows_from_range
+
+_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+_REF_RE = re.compile(r"^(?:'((?:[^']|'')+)'|([^!]+))!(.+)$")
+
+
+class XlsxReader:
+    """
+    Lecteur minimal de fichiers .xlsx, sans passer par openpyxl.
+
+    Seules les parties nécessaires du classeur sont lues: la liste des feuilles,
+    les plages nommées (y compris celles propres à une feuille) et les cellules
+    demandées. Les valeurs lues sont celles enregistrées par Excel lors de la
+    dernière sauvegarde, comme avec openpyxl en mode `data_only`.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        self._shared_strings: list[str] | None = None
+        self._number_formats: list[str] | None = None
+        self.sheets: dict[str, str] = {}
+        self.defined_names: dict[str, str] = {}
+        self.sheet_defined_names: dict[str, dict[str, str]] = {}
+        self._read_workbook()
+
+    def __enter__(self) -> "XlsxReader":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._zip.close()
+
+    def named_cell(self, name: str, sheet: str | None = None) -> tuple[str, str] | None:
+        """
+        Retourne (feuille, cellule) de la plage nommée. Une plage propre à la feuille
+        `sheet` a priorité sur une plage du classeur, comme dans Excel.
+        """
+        ref = None
+        if sheet is not None:
+            ref = self.sheet_defined_names.get(sheet, {}).get(name)
+        if ref is None:
+            ref = self.defined_names.get(name)
+        if ref is None:
+            return None
+        return split_reference(ref)
+
+    def read_cells(self, sheet: str, coordinates: Set[str]) -> dict[str, Any]:
+        """
+        Lit les cellules demandées d'une feuille en un seul passage. La lecture
+        s'arrête dès que la dernière ligne demandée est dépassée.
+        """
+        return {ref: value for ref, (value, _) in
+                self.read_cells_formats(sheet, coordinates).items()}
+
+    def read_cells_formats(self, sheet: str,
+                           coordinates: Set[str]) -> dict[str, tuple[Any, str]]:
+        """
+        Comme `read_cells`, mais retourne aussi le format de nombre de chaque
+        cellule (ex: "General", "0%"), pour distinguer un pourcentage d'un nombre.
+        """
+        if not coordinates:
+            return {}
+        wanted = {coord.replace("$", "").upper() for coord in coordinates}
+        last_row = max(coordinate_from_string(coord)[1] for coord in wanted)
+        values: dict[str, tuple[Any, str]] = dict.fromkeys(wanted, (None, "General"))
+
+        with self._zip.open(self.sheets[sheet]) as f:
+            for _, elem in iterparse(f, events=("end",)):
+                if elem.tag == f"{_NS}c":
+                    ref = elem.get("r")
+                    if ref in wanted:
+                        value = self._cell_value(elem)
+                        # Le format n'est utile que pour les nombres
+                        number_format = "General"
+                        if isinstance(value, int | float) and not isinstance(value, bool):
+                            number_format = self._number_format(int(elem.get("s", "0")))
+                        values[ref] = (value, number_format)
+                elif elem.tag == f"{_NS}row":
+                    row = elem.get("r")
+                    elem.clear()
+                    if row is not None and int(row) >= last_row:
+                        break
+        return values
+
+    def read_range(self, sheet: str, cell_range: str) -> dict[str, Any]:
+        """
+        Lit toutes les cellules d'une plage rectangulaire (ex: "D10:G20").
+        """
+        return self.read_cells(sheet, range_coordinates(cell_range))
+
+    def read_range_formats(self, sheet: str, cell_range: str) -> dict[str, tuple[Any, str]]:
+        """
+        Comme `read_range`, avec le format de nombre de chaque cellule.
+        """
+        return self.read_cells_formats(sheet, range_coordinates(cell_range))
+
+    def read_formulas(self, sheet: str) -> dict[str, Any]:
+        """
+        Lit toutes les cellules d'une feuille comme openpyxl sans `data_only`: les
+        formules sont retournées sous forme de texte (ex: "=SUM(C10:C12)") et les
+        autres cellules avec leur valeur. Les formules partagées sont recopiées
+        pour chaque cellule.
+        """
+        values: dict[str, Any] = {}
+        # Formules partagées: identifiant -> (formule, cellule d'origine)
+        shared: dict[str, tuple[str, str]] = {}
+        with self._zip.open(self.sheets[sheet]) as f:
+            for _, elem in iterparse(f, events=("end",)):
+                if elem.tag == f"{_NS}c":
+                    ref = elem.get("r", "")
+                    formula = elem.find(f"{_NS}f")
+                    if formula is None:
+                        values[ref] = self._cell_value(elem)
+                    else:
+                        values[ref] = _formula_text(formula, ref, shared)
+                elif elem.tag == f"{_NS}row":
+                    elem.clear()
+        return values
+
+    def _read_workbook(self):
+        rels = {}
+        with self._zip.open("xl/_rels/workbook.xml.rels") as f:
+            for _, elem in iterparse(f):
+                if elem.tag == f"{_PKG_REL_NS}Relationship":
+                    target = elem.get("Target", "")
+                    if target.startswith("/"):
+                        target = target[1:]
+                    else:
+                        target = posixpath.normpath(posixpath.join("xl", target))
+                    rels[elem.get("Id")] = target
+
+        titles = []
+        local_names = []
+        with self._zip.open("xl/workbook.xml") as f:
+            for _, elem in iterparse(f):
+                if elem.tag == f"{_NS}sheet":
+                    title = elem.get("name", "")
+                    titles.append(title)
+                    self.sheets[title] = rels.get(elem.get(f"{_REL_NS}id"), "")
+                elif elem.tag == f"{_NS}definedName":
+                    name = elem.get("name", "")
+                    local_id = elem.get("localSheetId")
+                    if local_id is None:
+                        self.defined_names[name] = elem.text or ""
+                    else:
+                        local_names.append((int(local_id), name, elem.text or ""))
+        for local_id, name, ref in local_names:
+            if local_id < len(titles):
+                self.sheet_defined_names.setdefault(titles[local_id], {})[name] = ref
+
+    def _cell_value(self, elem) -> Any:
+        cell_type = elem.get("t", "n")
+        if cell_type == "inlineStr":
+            inline = elem.find(f"{_NS}is")
+            return _rich_text(inline) if inline is not None else None
+        v = elem.find(f"{_NS}v")
+        if v is None or v.text is None:
+            return None
+        text = v.text
+        if cell_type == "s":
+            return self._strings()[int(text)]
+        if cell_type == "b":
+            return text == "1"
+        if cell_type in ("str", "e"):
+            return text
+        # Même convention qu'openpyxl: un nombre sans point ni exposant est un entier
+        try:
+            if "." in text or "E" in text.upper():
+                return float(text)
+            return int(text)
+        except ValueError:
+            return text
+
+    def _number_format(self, style: int) -> str:
+        if self._number_formats is None:
+            self._number_formats = []
+            if "xl/styles.xml" in self._zip.namelist():
+                custom: dict[int, str] = {}
+                root = fromstring(self._zip.read("xl/styles.xml"))
+                for fmt in root.iter(f"{_NS}numFmt"):
+                    custom[int(fmt.get("numFmtId", "0"))] = fmt.get("formatCode", "General")
+                cell_xfs = root.find(f"{_NS}cellXfs")
+                for xf in cell_xfs if cell_xfs is not None else []:
+                    fmt_id = int(xf.get("numFmtId", "0"))
+                    self._number_formats.append(
+                        custom.get(fmt_id) or BUILTIN_FORMATS.get(fmt_id, "General")
+                    )
+        if style < len(self._number_formats):
+            return self._number_formats[style]
+        return "General"
+
+    def _strings(self) -> list[str]:
+        if self._shared_strings is None:
+            self._shared_strings = []
+            if "xl/sharedStrings.xml" in self._zip.namelist():
+                with self._zip.open("xl/sharedStrings.xml") as f:
+                    for _, elem in iterparse(f):
+                        if elem.tag == f"{_NS}si":
+                            self._shared_strings.append(_rich_text(elem))
+                            elem.clear()
+        return self._shared_strings
+
+
+@lru_cache(maxsize=64)
+def range_coordinates(cell_range: str) -> frozenset[str]:
+    """
+    Coordonnées de toutes les cellules d'une plage (ex: "D10:E11" donne D10, E10, D11, E11).
+    """
+    return frozenset(coord for row in rows_from_range(cell_range) for coord in row)
+
+
+def split_reference(ref: str) -> tuple[str, str] | None:
+    """
+    Sépare une référence comme `'Ma feuille'!$C$2` en (feuille, cellule).
+    """
+    match = _REF_RE.match(ref.strip())
+    if match is None:
+        return None
+    title = match.group(1).replace("''", "'") if match.group(1) else match.group(2)
+    return title, match.group(3).replace("$", "")
+
+
+def _formula_text(formula, ref: str, shared: dict[str, tuple[str, str]]) -> str | None:
+    text = formula.text
+    shared_id = formula.get("si")
+    if formula.get("t") == "shared" and shared_id is not None:
+        if text:
+            shared[shared_id] = (f"={text}", ref)
+        elif shared_id in shared:
+            origin_formula, origin = shared[shared_id]
+            return Translator(origin_formula, origin=origin).translate_formula(ref)
+    return f"={text}" if text else None
+
+
+def _rich_text(elem) -> str:
+    """
+    Texte d'une chaîne, simple (<t>) ou enrichie (<r><t>). Les indications
+    phonétiques (<rPh>) sont ignorées.
+    """
+    t = elem.find(f"{_NS}t")
+    if t is not None:
+        return t.text or ""
+    return "".join(r.findtext(f"{_NS}t", default="") for r in elem.findall(f"{_NS}r"))